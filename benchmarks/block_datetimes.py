@@ -0,0 +1,90 @@
+"""
+Compare building the Trade Datetime and Reported Datetime columns of the
+BLOCK loader row by row, with datetime.strptime and pytz.localize, against
+BlockLoader._load, which parses the times with a single to_datetime and
+calls tz_localize once per timezone.
+
+A synthetic history of block trades, with rows in both ET and CT, is
+written to a temporary file. The row-by-row version localizes each row in
+its own timezone, so that the results can be compared. The only values
+expected to differ are times in the hour repeated when daylight saving
+time ends: pytz.localize takes them as standard time, but the Series built
+by apply converts them to daylight time. The row-by-row version needs the
+pytz package; without it, only BlockLoader._load is timed.
+
+    python benchmarks/block_datetimes.py [rows] [years]
+"""
+
+import datetime
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from datamine.loaders import Loader  # noqa: E402
+
+
+def write_file(path, rows, years):
+    rng = np.random.default_rng(0)
+    days = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 365 * years, rows), unit='D')
+    seconds = pd.to_timedelta(rng.integers(0, 86400, rows), unit='s')
+    trade = pd.Series(days + seconds)
+    reported = trade + pd.to_timedelta(rng.integers(60, 900, rows), unit='s')
+    zones = pd.Series(rng.choice([' ET', ' CT'], rows))
+    pd.DataFrame({
+        'Trade Date': days.strftime('%Y%m%d'),
+        'Trade Time': trade.dt.strftime('%H:%M:%S') + zones,
+        'Reported Time': reported.dt.strftime('%H:%M') + zones,
+        'Contract Symbol': rng.choice(['ESH0', 'NQM0', 'CLZ1'], rows),
+        'Product Code': rng.choice(['ES', 'NQ', 'CL'], rows),
+        'Trade Price': np.round(rng.normal(3000, 50, rows), 2),
+        'Trade Quantity': rng.integers(1, 500, rows),
+    }).to_csv(path, index=False, compression='gzip')
+
+
+def per_row(path):
+    '''The datetime columns as BlockLoader built them before, with
+       datetime.strptime and pytz.localize on each row, but in the timezone
+       of each row rather than that of the first.'''
+    import pytz
+    timezones = {'ET': pytz.timezone('US/Eastern'), 'CT': pytz.timezone('US/Central')}
+    df = pd.read_csv(path, dtype={'Trade Time': str, 'Reported Time': str})
+    dates = df['Trade Date'].astype('str') + ' '
+    columns = []
+    for col, format in (('Trade Time', '%Y%m%d %H:%M:%S'), ('Reported Time', '%Y%m%d %H:%M')):
+        local = (dates + df[col].str[:-3]).apply(datetime.datetime.strptime, args=(format,))
+        columns.append(pd.Series([timezones[zone].localize(value) for value, zone in zip(local, df[col].str[-2:])],
+                                 index=df.index))
+    return columns
+
+
+def main(rows=100000, years=5):
+    loader = Loader.by_name('BLOCK')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'block.csv.gz')
+        write_file(path, rows, years)
+        start = time.perf_counter()
+        df = loader._load(path)
+        after = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            expected = per_row(path)
+        except ImportError:
+            print('BLOCK {:,} rows over {} years  per timezone {:6.3f}s  '
+                  '(pytz is not installed, per row not timed)'.format(rows, years, after))
+            return
+        before = time.perf_counter() - start
+    differ = sum((pd.to_datetime(old, utc=True) != df[col]).sum()
+                 for old, col in zip(expected, ('Trade Datetime', 'Reported Datetime')))
+    print('BLOCK {:,} rows over {} years  per row {:6.3f}s  per timezone {:6.3f}s  {:5.1f}x  '
+          'values that differ: {}'.format(rows, years, before, after, before / after, differ))
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    main(*(int(arg) for arg in sys.argv[1:]))
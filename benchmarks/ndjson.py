@@ -0,0 +1,77 @@
+"""
+Compare reading a CRYPTOCURRENCY file by decoding each line with json.loads
+and building a dataframe from a list of dicts, as CryptocurrencyLoader did,
+against Loader._read_json with each parse engine: 'c', which decodes the
+lines a chunk at a time, with orjson if it is installed, and 'pyarrow',
+which uses the Arrow JSON reader.
+
+A synthetic gzipped file of index updates, one entry each, is written to a
+temporary directory:
+
+    python benchmarks/ndjson.py [updates]
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from datamine.loaders import Loader  # noqa: E402
+from datamine.loaders.base import orjson, pa  # noqa: E402
+
+
+def write_file(path, updates):
+    rng = np.random.default_rng(0)
+    prices = np.round(9000 + rng.normal(0, 50, updates), 2)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for i, price in enumerate(prices):
+            f.write(json.dumps({'msgType': 'X', 'mdEntries': [{
+                'mdUpdateAction': 'NEW', 'mdEntryType': '3', 'mdEntryCode': 'RTI', 'symbol': 'BRTI',
+                'mdEntryPx': price, 'rptSeq': i, 'netChgPrevDay': 1.5, 'netPctChg': 0.02,
+                'openCloseSettlFlag': '5', 'mdEntryDate': '20200102',
+                'mdEntryTime': '{:02d}:{:02d}:{:02d}.000'.format(i // 3600 % 24, i // 60 % 60, i % 60)}]}))
+            f.write('\n')
+
+
+def per_line(path):
+    '''The entries of the file as CryptocurrencyLoader read them before.'''
+    result = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = json.loads(line)
+            if 'mdEntries' in line:
+                result.append(line['mdEntries'][0])
+    return pd.DataFrame(result)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(updates=500000):
+    loader = Loader.by_name('CRYPTOCURRENCY')
+    engines = ('c', 'pyarrow') if pa is not None else ('c',)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, '20200102_btcIndexJson.gz')
+        write_file(path, updates)
+        before, expected = timed(per_line, path)
+        print('CRYPTOCURRENCY {:,} updates  per line {:6.3f}s'.format(updates, before))
+        for engine in engines:
+            after, actual = timed(loader._using(engine)._read_json, path, 'mdEntries')
+            name = engine if engine != 'c' else 'json' if orjson is None else 'orjson'
+            print('    {:8} {:6.3f}s  {:5.1f}x  identical: {}'.format(
+                name, after, before / after, expected.equals(actual)))
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,79 @@
+"""
+Compare converting the date columns of a loader with pd.to_datetime over
+every row against _to_datetime, which parses each distinct value once and
+remembers the values parsed for earlier files.
+
+Synthetic columns are generated from the declared date columns of the EOD
+and ERIS loaders, with a few distinct dates each, as in the real files:
+
+    python benchmarks/parse_dates.py [rows] [files]
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from datamine.loaders import Loader  # noqa: E402
+from datamine.loaders.base import _to_datetime, _parse_dates, _PARSED_DATES  # noqa: E402
+
+
+def _date_columns(loader):
+    for dtype, cols in loader.dtypes.items():
+        if dtype.startswith('date'):
+            format = None if dtype == 'date' else dtype[5:]
+            for col in ((cols,) if isinstance(cols, str) else cols):
+                yield col, format
+
+
+def make_file(loader, rows, day, rng):
+    '''Return a dataframe of date columns as they are before _set_dtypes.'''
+    data = {}
+    for col, format in _date_columns(loader):
+        dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(day + rng.integers(0, 250, rows), unit='D')
+        if format == '%Y%m%d':
+            # Parsed as integers by read_csv
+            data[col] = dates.strftime(format).astype(int)
+        else:
+            data[col] = dates.strftime(format or '%Y-%m-%d')
+    return pd.DataFrame(data)
+
+
+def convert(loader, frames, fn):
+    start = time.perf_counter()
+    results = []
+    for df in frames:
+        df = df.copy()
+        for col, format in _date_columns(loader):
+            df[col] = fn(df[col], format)
+        results.append(df)
+    return time.perf_counter() - start, results
+
+
+def every_row(col, format):
+    '''Parse every row, leaving the column as it is if any value is not a date.'''
+    parsed = _parse_dates(col, format)
+    return col if parsed is None else parsed
+
+
+def main(rows=500000, files=4):
+    rng = np.random.default_rng(0)
+    for dataset in ('EOD', 'ERIS'):
+        loader = Loader.by_name(dataset)
+        frames = [make_file(loader, rows, day, rng) for day in range(files)]
+        before, expected = convert(loader, frames, every_row)
+        _PARSED_DATES.clear()
+        after, actual = convert(loader, frames, _to_datetime)
+        same = all(a.equals(b) for a, b in zip(expected, actual))
+        ncols = len(frames[0].columns)
+        print('{:5} {} files x {:,} rows x {} date columns  every row {:6.3f}s  distinct values {:6.3f}s  '
+              '{:5.1f}x  identical: {}'.format(dataset, files, rows, ncols, before, after, before / after, same))
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    main(*(int(arg) for arg in sys.argv[1:]))
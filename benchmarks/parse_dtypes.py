@@ -0,0 +1,99 @@
+"""
+Compare reading files with the dtypes of each loader applied as they are
+parsed (Loader.parse_dtypes = True) against converting each column after
+parsing (Loader.parse_dtypes = False). The gain comes from the categorical
+columns, which are built as they are parsed rather than from columns of
+strings. 1QBIT files have few of those among hundreds of numeric columns,
+which read_csv infers as float64 either way, so OneQBitLoader leaves
+parse_dtypes off; the last column gives the default of each loader.
+
+Synthetic files are generated from the declared columns and dtypes of the
+EOD, FX and 1QBIT loaders, so no downloaded data is needed:
+
+    python benchmarks/parse_dtypes.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from datamine.loaders import Loader  # noqa: E402
+
+REPEAT = 3
+BLOCK_ROWS = 1000
+
+
+def _declared(loader):
+    declared = {}
+    for dtype, cols in loader.dtypes.items():
+        for col in ((cols,) if isinstance(cols, str) else cols):
+            declared[col] = dtype
+    return declared
+
+
+def _column(dtype, rows, rng):
+    if dtype == 'category':
+        choices = np.array(['ES', 'NQ', 'CL', 'GC', 'ZN', '6E', '2020', '3000.5', ''])
+        return rng.choice(choices[rng.integers(0, 3):], rows)
+    if dtype == 'int64':
+        return rng.integers(0, 100000, rows).astype(str)
+    if dtype == 'float':
+        return np.round(rng.normal(100, 10, rows), 4).astype(str)
+    if dtype.startswith('date'):
+        return np.full(rows, '20200102')
+    return rng.integers(0, 10, rows).astype(str)
+
+
+def write_file(loader, path, rows, skiprows=1):
+    '''Write a block of BLOCK_ROWS random rows, repeated to make up the
+       given number: formatting every row would take longer than the
+       parsing that is measured.'''
+    rng = np.random.default_rng(0)
+    declared = _declared(loader)
+    columns = loader.columns[loader.column_offset:]
+    block = min(rows, BLOCK_ROWS)
+    data = pd.DataFrame({i: _column(declared.get(col, 'int64'), block, rng) for i, col in enumerate(columns)})
+    lines = data.to_csv(header=False, index=False).splitlines(keepends=True)
+    with open(path, 'wt') as fp:
+        fp.write('header\n' * skiprows)
+        fp.write(''.join(lines) * (rows // block))
+        fp.write(''.join(lines[:rows % block]))
+
+
+def measure(loader, path):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        df = loader._load_single(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+
+def main(rows=50000):
+    with tempfile.TemporaryDirectory() as tmp:
+        for dataset, skiprows in (('EOD', 1), ('FX', 1), ('1QBIT', 3)):
+            loader = Loader.by_name(dataset)
+            default = 'while' if loader.parse_dtypes else 'after'
+            path = os.path.join(tmp, dataset + '.csv')
+            write_file(loader, path, rows, skiprows)
+            results = {}
+            for parse in (False, True):
+                loader.parse_dtypes = parse
+                results[parse] = measure(loader, path)
+            del loader.parse_dtypes
+            before, after = results[False][0], results[True][0]
+            same = results[False][1].equals(results[True][1])
+            print('{:6} {:>9,} rows  after parsing {:6.3f}s  while parsing {:6.3f}s  {:4.1f}x  identical: {}  '
+                  'default: {} parsing'.format(dataset, rows, before, after, before / after, same, default))
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,74 @@
+"""
+Time the two steps of TickLoader changed to avoid work on every row:
+
+- building trade_date_time by joining trade_date and trade_time as strings
+  and parsing the result, against _trade_datetimes, which converts each
+  distinct date and time once;
+- sorting the concatenation of the files by (trade_date_time,
+  trade_sequence_number), against Loader._concat_sorted, which merges the
+  files, each already sorted, where their times overlap.
+
+Synthetic files are built in memory, one per product and day:
+
+    python benchmarks/tick_sort.py [rows per file] [products] [days]
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from datamine.loaders import Loader  # noqa: E402
+from datamine.loaders.tick import _trade_datetimes  # noqa: E402
+
+
+def make_file(rows, day, rng):
+    '''Return the date, time and sequence number columns of a day of trades.'''
+    seconds = np.sort(rng.integers(8 * 3600, 16 * 3600, rows))
+    times = pd.Series(pd.to_timedelta(seconds, unit='s')).astype(str).str[-8:]
+    return pd.DataFrame({'trade_date': (pd.Timestamp('2020-01-01') + pd.Timedelta(days=day)).strftime('%Y%m%d'),
+                         'trade_time': times, 'trade_sequence_number': np.arange(rows)}).astype({'trade_date': int})
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(rows=200000, products=4, days=5):
+    rng = np.random.default_rng(0)
+    loader = Loader.by_name('TICK')
+    frames = [make_file(rows, day, rng) for day in range(days) for _ in range(products)]
+
+    def joined(df):
+        return pd.to_datetime(df['trade_date'].astype(str) + 'T' + df['trade_time'].astype(str), utc=True)
+
+    def combined(df):
+        return pd.to_datetime(_trade_datetimes(df['trade_date'], df['trade_time']), utc=True)
+
+    before, expected = timed(lambda: [joined(df) for df in frames])
+    after, actual = timed(lambda: [combined(df) for df in frames])
+    same = all(a.equals(b) for a, b in zip(expected, actual))
+    print('trade_date_time  {} files x {:,} rows  strings {:6.3f}s  per distinct value {:6.3f}s  {:5.1f}x  '
+          'identical: {}'.format(len(frames), rows, before, after, before / after, same))
+
+    for df, datetimes in zip(frames, actual):
+        df.insert(0, 'trade_date_time', datetimes)
+    # The files arrive in no particular order
+    shuffled = [frames[i] for i in rng.permutation(len(frames))]
+    keys = list(loader.sort_by)
+    before, expected = timed(lambda: pd.concat(shuffled, ignore_index=True).sort_values(
+        keys, kind='mergesort', ignore_index=True))
+    after, actual = timed(loader._concat_sorted, shuffled)
+    print('sorted result    {} files x {:,} rows  sort {:6.3f}s  merge {:6.3f}s  {:5.1f}x  '
+          'identical: {}'.format(len(frames), rows, before, after, before / after, expected.equals(actual)))
+
+
+if __name__ == '__main__':
+    warnings.simplefilter('ignore')
+    main(*(int(arg) for arg in sys.argv[1:]))
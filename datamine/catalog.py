@@ -0,0 +1,235 @@
+import bisect
+import fnmatch
+import json
+import os
+import time
+
+from .utils import logger, sqlite_connect
+
+CATALOG_NAME = '.datamine_catalog.sqlite'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    fid TEXT PRIMARY KEY,
+    dataset TEXT,
+    yyyymmdd TEXT,
+    record TEXT
+);
+CREATE INDEX IF NOT EXISTS files_dataset_date ON files (dataset, yyyymmdd);
+CREATE TABLE IF NOT EXISTS syncs (
+    dataset TEXT PRIMARY KEY,
+    synced REAL
+);
+'''
+
+
+def _yyyymmdd(value):
+    # Accept dates, datetimes and Timestamps as well as strings and
+    # integers, in either YYYYMMDD or YYYY-MM-DD form
+    if value is None:
+        return None
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y%m%d')
+    return str(value).replace('-', '')
+
+
+class CatalogIndex(dict):
+    """
+    The catalog, as a dictionary of records keyed by FID, with secondary
+    indexes by dataset and by publication date (the yyyymmdd field).
+
+    The dataset index is maintained as records are added and removed. The
+    date index of a dataset is a sorted list that is rebuilt on first use
+    after the dataset has changed, so that date ranges can be selected
+    with a binary search.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(CatalogIndex, self).__init__()
+        self._by_dataset = {}
+        self._by_date = {}
+        self.update(*args, **kwargs)
+
+    def _add(self, fid, record):
+        dataset = record.get('dataset')
+        self._by_dataset.setdefault(dataset, set()).add(fid)
+        self._by_date.pop(dataset, None)
+
+    def _remove(self, fid):
+        dataset = dict.__getitem__(self, fid).get('dataset')
+        fids = self._by_dataset.get(dataset)
+        if fids is not None:
+            fids.discard(fid)
+            if not fids:
+                del self._by_dataset[dataset]
+        self._by_date.pop(dataset, None)
+
+    def __setitem__(self, fid, record):
+        if fid in self:
+            self._remove(fid)
+        dict.__setitem__(self, fid, record)
+        self._add(fid, record)
+
+    def __delitem__(self, fid):
+        self._remove(fid)
+        dict.__delitem__(self, fid)
+
+    def update(self, *args, **kwargs):
+        for fid, record in dict(*args, **kwargs).items():
+            self[fid] = record
+
+    def setdefault(self, fid, record=None):
+        if fid not in self:
+            self[fid] = record
+        return self[fid]
+
+    def pop(self, fid, *default):
+        if fid in self:
+            self._remove(fid)
+        return dict.pop(self, fid, *default)
+
+    def popitem(self):
+        fid, record = dict.popitem(self)
+        dict.__setitem__(self, fid, record)
+        self._remove(fid)
+        dict.__delitem__(self, fid)
+        return fid, record
+
+    def clear(self):
+        dict.clear(self)
+        self._by_dataset.clear()
+        self._by_date.clear()
+
+    def datasets(self):
+        """Return the names of the datasets in the catalog."""
+        return list(self._by_dataset)
+
+    def _dates(self, dataset):
+        dates = self._by_date.get(dataset)
+        if dates is None:
+            dates = sorted((dict.__getitem__(self, fid).get('yyyymmdd') or '', fid)
+                           for fid in self._by_dataset.get(dataset, ()))
+            self._by_date[dataset] = dates
+        return dates
+
+    def select(self, dataset=None, start=None, end=None, pattern=None):
+        """Return the FIDs of the records matching the given criteria.
+
+           :param dataset: Only select records from this dataset.
+           :param start: Only select records published on or after this date.
+           :param end: Only select records published on or before this date.
+           :param pattern: Only select records whose filename, or FID if the
+                           record has no filename, matches this shell-style pattern.
+        """
+        start, end = _yyyymmdd(start), _yyyymmdd(end)
+        datasets = self._by_dataset if dataset is None else (dataset,)
+        fids = []
+        for name in datasets:
+            if start is None and end is None:
+                fids.extend(self._by_dataset.get(name, ()))
+                continue
+            dates = self._dates(name)
+            lo = bisect.bisect_left(dates, (start or '\x01',))
+            hi = bisect.bisect_right(dates, (end + '\uffff',)) if end else len(dates)
+            fids.extend(fid for _, fid in dates[lo:hi])
+        if pattern is not None:
+            fids = [fid for fid in fids
+                    if fnmatch.fnmatch(dict.__getitem__(self, fid).get('filename') or fid, pattern)]
+        return fids
+
+
+class CatalogCache(object):
+    """
+    Local copy of the Datamine catalog, stored in an SQLite database in the
+    root of the download path.
+
+    Catalog records are indexed by dataset and publication date. The time
+    of the last complete listing of each dataset (or of the whole catalog,
+    recorded under the empty string) is kept so that later listings can
+    stop as soon as they reach records that are already known. SQLite
+    handles the locking, so several processes can share one cache.
+    """
+
+    def __init__(self, path, name=CATALOG_NAME):
+        self.path = path
+        self.filename = os.path.join(path, name)
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite_connect(self.filename, None if self._initialized else _SCHEMA)
+        self._initialized = True
+        return conn
+
+    def load(self, dataset=None):
+        """Return the cached records for a dataset, or for every dataset, keyed by FID."""
+        if not os.path.exists(self.filename):
+            return CatalogIndex()
+        conn = self._connect()
+        try:
+            if dataset is None:
+                rows = conn.execute('SELECT fid, record FROM files')
+            else:
+                rows = conn.execute('SELECT fid, record FROM files WHERE dataset = ?', (dataset,))
+            return CatalogIndex((fid, json.loads(record)) for fid, record in rows)
+        finally:
+            conn.close()
+
+    def store(self, records):
+        """Insert or replace the given catalog records."""
+        rows = [(record['fid'], record.get('dataset'), record.get('yyyymmdd'), json.dumps(record))
+                for record in records]
+        if not rows:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', rows)
+        finally:
+            conn.close()
+        logger.debug('catalog cache: stored {} records'.format(len(rows)))
+
+    def last_synced(self, dataset=None):
+        """Return the time of the last complete listing of the dataset, or None.
+
+           A complete listing of the whole catalog also covers each dataset.
+        """
+        if not os.path.exists(self.filename):
+            return None
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT MAX(synced) FROM syncs WHERE dataset IN (?, ?)',
+                                (dataset or '', ''))
+            return rows.fetchone()[0]
+        finally:
+            conn.close()
+
+    def mark_synced(self, dataset=None):
+        """Record that the dataset, or the whole catalog, has been listed completely.
+
+           Incremental syncs are not recorded, so that the time of the last
+           complete listing is known.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO syncs VALUES (?, ?)', (dataset or '', time.time()))
+        finally:
+            conn.close()
+
+    def retain(self, fids, dataset=None):
+        """Remove the cached records for a dataset, or for every dataset, that
+           are not among the given FIDs."""
+        if not os.path.exists(self.filename):
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('CREATE TEMP TABLE keep (fid TEXT PRIMARY KEY)')
+                conn.executemany('INSERT OR IGNORE INTO keep VALUES (?)', ((fid,) for fid in fids))
+                query = 'DELETE FROM files WHERE fid NOT IN (SELECT fid FROM keep)'
+                if dataset is None:
+                    conn.execute(query)
+                else:
+                    conn.execute(query + ' AND dataset = ?', (dataset,))
+        finally:
+            conn.close()
@@ -0,0 +1,144 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from .utils import logger
+
+# Status codes with which a server asks us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value):
+    """Return the number of seconds requested by a Retry-After header, or None.
+
+       The header may hold either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveConcurrency(object):
+    """
+    Additive-increase/multiplicative-decrease control of the number of
+    simultaneous downloads.
+
+    Completed transfers are grouped into windows of roughly `limit`
+    transfers. At the end of each window the throughput, mean latency and
+    error rate of the window are compared with the best seen so far:
+
+    - if the server throttled us (429/503), or too many transfers failed,
+      the limit is multiplied by `decrease`;
+    - if throughput is still growing, the limit is increased by one;
+    - if throughput has fallen well below the best while latency has
+      grown, we are past the knee, and the limit is multiplied by `decrease`;
+    - otherwise the limit is held.
+
+    A Retry-After header received with a throttling response also stops
+    new transfers from starting until the requested time has passed.
+
+    Downloads call acquire (or try_acquire, from asyncio code) before
+    starting a transfer, and release when it is done.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, decrease=0.5,
+                 max_error_rate=0.1, min_window=4):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.max_error_rate = max_error_rate
+        self.min_window = min_window
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.inflight = 0
+        self._cond = threading.Condition()
+        self._resume_at = 0.0
+        self._best_throughput = 0.0
+        self._last_throughput = 0.0
+        self._best_latency = None
+        self._reset_window(time.time())
+
+    def _reset_window(self, now):
+        self._window_start = now
+        self._window_bytes = 0
+        self._window_done = 0
+        self._window_errors = 0
+        self._window_throttled = False
+        self._window_latency = 0.0
+
+    def try_acquire(self):
+        """Start a transfer if allowed, returning 0; otherwise return the
+           number of seconds to wait before trying again."""
+        with self._cond:
+            wait = self._resume_at - time.time()
+            if wait > 0:
+                return wait
+            if self.inflight >= int(self.limit):
+                return 0.05
+            self.inflight += 1
+            return 0
+
+    def acquire(self):
+        """Block until a transfer may be started."""
+        with self._cond:
+            while True:
+                wait = self._resume_at - time.time()
+                if wait <= 0 and self.inflight < int(self.limit):
+                    self.inflight += 1
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def throttled(self, retry_after=None):
+        """Record that the server asked us to slow down."""
+        with self._cond:
+            self._window_throttled = True
+            if retry_after:
+                self._resume_at = max(self._resume_at, time.time() + retry_after)
+                logger.info('adaptive: server requested a {:.1f}s pause'.format(retry_after))
+            self._cond.notify_all()
+
+    def release(self, nbytes=0, elapsed=0.0, error=False):
+        """Record the outcome of a transfer started with acquire."""
+        with self._cond:
+            self.inflight -= 1
+            self._window_done += 1
+            self._window_bytes += nbytes
+            self._window_latency += elapsed
+            self._window_errors += bool(error)
+            if self._window_done >= max(self.min_window, int(self.limit)):
+                self._adjust(time.time())
+            self._cond.notify_all()
+
+    def _adjust(self, now):
+        duration = max(now - self._window_start, 1e-6)
+        throughput = self._window_bytes / duration
+        latency = self._window_latency / self._window_done
+        error_rate = self._window_errors / self._window_done
+        old_limit = self.limit
+        if self._window_throttled or error_rate > self.max_error_rate:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            # Conditions have changed, so measure afresh
+            self._best_throughput = 0.0
+        elif throughput > 1.05 * self._last_throughput:
+            self.limit = min(self.maximum, self.limit + 1)
+        elif (throughput < 0.8 * self._best_throughput and self._best_latency is not None and
+              latency > 1.5 * self._best_latency):
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self._best_throughput = 0.0
+        self._best_throughput = max(self._best_throughput, throughput)
+        self._last_throughput = throughput
+        if not error_rate:
+            self._best_latency = latency if self._best_latency is None else min(self._best_latency, latency)
+        if int(self.limit) != int(old_limit):
+            logger.debug('adaptive: {:.0f} B/s, {:.3f}s latency, {:.0%} errors; limit {} -> {}'.format(
+                throughput, latency, error_rate, int(old_limit), int(self.limit)))
+        self._reset_window(now)
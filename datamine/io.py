@@ -12,20 +12,41 @@ import urllib3
 import cgi
 import os
 import sys
+import time
+import functools
+import fnmatch
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from tqdm import tqdm
 
 # Generate logger
 logging.basicConfig(filename='datamine.log', filemode='w', format='%(levelname)s - %(asctime)s - %(message)s', level=logging.ERROR)
 
-from .utils import tqdm_execute_tasks, MAX_WORKERS, logger
+from .utils import tqdm_execute_tasks, run_coroutine, MAX_WORKERS, logger
 from .loaders import Loader
+from .manifest import DownloadManifest
+from .catalog import CatalogCache, CatalogIndex
+from .store import PartitionedStore, STORE_NAME
+from .concurrency import AdaptiveConcurrency, THROTTLE_STATUSES, parse_retry_after
 
 DEFAULT_URL = 'https://datamine.cmegroup.com/cme/api/v1'
 NO_LIMIT = sys.maxsize
 TIMEOUTS = (3.05, 60)
 PAGE_SIZE = 1000
-CHUNK_SIZE = 1024
+CHUNK_SIZE = 64 * 1024
+PART_SUFFIX = '.part'
+DOWNLOAD_ATTEMPTS = 5
+BACKOFF_FACTOR = 2
+ENGINES = ('thread', 'asyncio')
+ADAPTIVE_MAX_THREADS = 64
+# Client errors worth retrying: a request timeout, and too many requests.
+# Other 4xx responses, such as 403 or 404, fail at once
+RETRY_STATUSES = (408, 429)
+# Incremental catalog syncs assume the listing returns the newest files
+# first. Should it not, files would be missed, so the catalog is listed in
+# full again once the last full listing is older than this, in seconds
+CATALOG_FULL_SYNC_AGE = 24 * 60 * 60
 
 
 def _url_params(url):
@@ -34,10 +55,157 @@ def _url_params(url):
         return parts[0], None
     return parts[0], dict(map(lambda x: x.split('=', 1), parts[1].split('&')))
 
+def _expected_size(headers, offset):
+    # The total size is reported in the Content-Range header of a
+    # partial response, and in the Content-Length of a full one. If the
+    # content is encoded, requests decodes it and the lengths won't match.
+    content_range = headers.get('content-range', '')
+    if '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = headers.get('content-length')
+    if length is None or not length.isdigit() or headers.get('content-encoding'):
+        return None
+    return offset + int(length)
+
+def _check_status(status, fid):
+    # Raise the error for a failed response, which is retried only if the
+    # server may yet succeed; 416 is handled by the caller
+    if status < 400 or status == 416:
+        return
+    message = 'HTTP {} downloading FID: {}'.format(status, fid)
+    if status >= 500 or status in RETRY_STATUSES:
+        raise RequestError(message)
+    raise PermanentRequestError(message)
+
 class RequestError(RuntimeError):
     pass
 
 
+class PermanentRequestError(RequestError):
+    """Raised for responses that retrying cannot fix, such as 403 or 404."""
+
+
+class ThrottleError(RequestError):
+    """Raised when the server responds with 429 or 503, asking us to slow down."""
+
+    def __init__(self, message, retry_after=None):
+        super(ThrottleError, self).__init__(message)
+        self.retry_after = retry_after
+
+
+class _PartialDownload(object):
+    """The state of one file download, shared by the thread and asyncio engines.
+
+       The engines differ only in how they send the request and read the
+       body. This class decides the range to ask for, checks the response,
+       opens the part file, chooses whether and when to retry, and renames
+       the finished file into place.
+    """
+
+    def __init__(self, con, fid):
+        if fid not in con.data_catalog:
+            raise RequestError('FID not found in the catalog: {}'.format(fid))
+        self.fid = fid
+        self.record = con.data_catalog[fid]
+        self.url, self.params = _url_params(self.record['url'])
+        assert self.url == con.url + '/download'
+        self.manifest = con.manifest
+
+        # If a previous attempt was interrupted, the manifest knows the filename
+        entry = self.manifest.get(fid)
+        self.filename = entry['filename'] if entry and not entry.get('complete') else None
+        self.dest_path = os.path.join(con.path, self.record['dataset'])
+        self.offset = 0
+        self.expected = None
+        self.failures = 0
+
+    @property
+    def part_path(self):
+        return os.path.join(self.dest_path, self.filename + PART_SUFFIX)
+
+    def request_headers(self):
+        """Return the headers of the next request, asking only for the bytes
+           missing from the part file if there is one."""
+        self.offset = 0
+        if self.filename is not None and os.path.exists(self.part_path):
+            self.offset = os.path.getsize(self.part_path)
+        return {'Range': 'bytes={}-'.format(self.offset)} if self.offset else None
+
+    def check_response(self, status, headers):
+        """Raise the error for a failed response. Returns False if the request
+           must be sent again, because the filename it revealed has a part file."""
+        if status in THROTTLE_STATUSES:
+            raise ThrottleError('HTTP {} downloading FID: {}'.format(status, self.fid),
+                                parse_retry_after(headers.get('retry-after')))
+        _check_status(status, self.fid)
+        if self.filename is None:
+            # The filename is embedded in the Content-Disposition header
+            header = headers.get('content-disposition', '')
+            try:
+                self.filename = os.path.basename(cgi.parse_header(header)[1]['filename'])
+            except Exception:
+                print ('''File Handling Area, looking for Content-Disposition Header and Lacks a 'header'...''')
+                print('Expected a "filename" entry in the Content-Disposition header found:\n  {}'.format(header))
+                print('See log file for further detail.')
+                logging.error(str(self.record['dataset']) + ' ' + str(self.url) + ' ' + ' ' + str(self.params) + ' ' + ('Expected a "filename" entry in the Content-Disposition header found:\n  {}'.format(header)))
+                raise RequestError('No filename supplied for FID: {}'.format(self.fid))
+            self.manifest.start(self.fid, self.record, self.filename)
+            if os.path.exists(self.part_path):
+                # Go around again, this time asking only for the missing bytes
+                return False
+        return True
+
+    def open_part(self, status, headers):
+        """Open the part file for the body of the response, or return None if
+           the server has nothing left to send."""
+        if not os.path.exists(self.dest_path):
+            os.makedirs(self.dest_path, exist_ok=True)
+        if status == 416:
+            # Nothing left to send: either the part file is already
+            # complete, or it is corrupt and must be started again.
+            self.expected = _expected_size(headers, 0)
+            if self.expected is None or self.expected != self.offset:
+                os.remove(self.part_path)
+                raise RequestError('Invalid partial download discarded: {}'.format(self.part_path))
+            return None
+        if self.offset and status != 206:
+            logger.debug('download_file: range not honored, restarting {}'.format(self.filename))
+            self.offset = 0
+        self.expected = _expected_size(headers, self.offset)
+        return open(self.part_path, 'ab' if self.offset else 'wb')
+
+    def finish(self):
+        """Check the size of the part file, rename it into place and record
+           it in the manifest. Returns the path of the downloaded file."""
+        part_path = self.part_path
+        nbytes = os.path.getsize(part_path)
+        if self.expected is not None and nbytes != self.expected:
+            raise RequestError('Incomplete download of {}: {} of {} bytes'.format(self.filename, nbytes, self.expected))
+        abs_path = os.path.join(self.dest_path, self.filename)
+        os.replace(part_path, abs_path)
+        self.manifest.complete(self.fid, self.record, self.filename, nbytes)
+        self.manifest.save()
+        return abs_path
+
+    def failed(self, exc, controller=None):
+        """Record a failed attempt and return the number of seconds to wait
+           before the next one. Raises if the download should be abandoned."""
+        if isinstance(exc, PermanentRequestError):
+            raise exc
+        self.failures += 1
+        if self.failures >= DOWNLOAD_ATTEMPTS:
+            raise RequestError('Download of {} failed after {} attempts: {}'.format(self.fid, self.failures, exc))
+        delay = BACKOFF_FACTOR * 2 ** (self.failures - 1)
+        if isinstance(exc, ThrottleError):
+            if controller is not None:
+                controller.throttled(exc.retry_after)
+            if exc.retry_after is not None:
+                delay = exc.retry_after
+        logger.warning('download_file: {}, retrying {} in {}s'.format(exc, self.fid, delay))
+        return delay
+
+
 class DatamineCon(object):
     """
         This class operates with CME Datamine to retrieve your data catalog,
@@ -58,7 +226,8 @@ class DatamineCon(object):
     debug = False 
 
     def __init__(self, path='./', username=None, password=None,
-                 url=DEFAULT_URL, threads=MAX_WORKERS):
+                 url=DEFAULT_URL, threads=MAX_WORKERS, engine='thread', adaptive=False,
+                 catalog_cache=True, parse_engine=None):
         """creates the variables associated with the class
 
         :type path: string
@@ -75,6 +244,22 @@ class DatamineCon(object):
 
         :type url: int
         :param url: The number of threads for downloading files.
+
+        :type engine: string
+        :param engine: The default download engine, 'thread' or 'asyncio'.
+
+        :type adaptive: bool
+        :param adaptive: Set to True to adjust the number of simultaneous downloads
+                         automatically, based on the measured throughput and errors.
+
+        :type catalog_cache: bool
+        :param catalog_cache: Set to False to disable the local copy of the catalog
+                              that is kept under path.
+
+        :type parse_engine: string, or None
+        :param parse_engine: The default engine used to parse CSV files when loading
+                             and transcoding datasets, 'c' for pandas or 'pyarrow' for
+                             the multithreaded Arrow CSV reader. Defaults to 'c'.
         """
         self.url = url
 
@@ -82,80 +267,257 @@ class DatamineCon(object):
         # Persistent sessions, connection pooling, retry management
         self.session = requests.Session()
         self.session.auth = requests.auth.HTTPBasicAuth(username, password)
-        retry = urllib3.util.Retry(read=3, backoff_factor=2, status_forcelist=[400])
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry)
-        self.session.mount('', adapter)
+        self._poolsize = 0
+        self._mount_adapter(threads)
 
         self.path = path
-        self.data_catalog = {}
+        self.manifest = DownloadManifest(path)
+        self.catalog_cache = CatalogCache(path) if catalog_cache else None
+        self.store = PartitionedStore(os.path.join(path, STORE_NAME))
+        self.data_catalog = CatalogIndex()
         self._dataset = None
         self._limit = -1
         self.threads = threads
+        self.engine = engine
+        self.parse_engine = parse_engine
+        self.adaptive = adaptive
+        self._controller = None
+
+    def _mount_adapter(self, threads):
+        # Size the pool so that every download thread can keep its connection
+        poolsize = max(threads, requests.adapters.DEFAULT_POOLSIZE)
+        if poolsize <= self._poolsize:
+            return
+        retry = urllib3.util.Retry(read=3, backoff_factor=2, status_forcelist=[400])
+        adapter = requests.adapters.HTTPAdapter(max_retries=retry, pool_connections=poolsize,
+                                                pool_maxsize=poolsize)
+        self.session.mount('', adapter)
+        self._poolsize = poolsize
 
-    def _call_api(self, endpoint, params, stream=False):
+    def _call_api(self, endpoint, params, stream=False, headers=None):
         url = self.url + '/' + endpoint
         param_str = '&'.join('{}={}'.format(*p) for p in params.items())
         logger.debug('_call_api: {}'.format(param_str))
-        return self.session.get(url, timeout=TIMEOUTS, params=params, stream=stream)
+        return self.session.get(url, timeout=TIMEOUTS, params=params, stream=stream, headers=headers)
 
     def download_file(self, fid):
         """Download a single file denoted by the given FID.
 
+           The file is first written to a ".part" file alongside its final
+           location. If the transfer is interrupted, it is resumed from the
+           end of the part file using an HTTP Range request. Once the size
+           announced by the server has been received, the part file is
+           renamed into place, so a partially downloaded file is never
+           visible under its final name.
+
            :type fid: string
            :param fid: The FID of the file to be retrieved.
+
+           :returns: the path of the downloaded file.
         """
 
-        if fid not in self.data_catalog:
-            raise RequestError('FID not found in the catalog: {}'.format(fid))
-        record = self.data_catalog[fid]
-        supplied_url, params = _url_params(record['url'])
-        assert supplied_url == self.url + '/download'
-        response = self._call_api('download', params, stream=True)
-        try:
-            # The filename is embedded in the Content-Disposition header
-            header = response.headers.get('content-disposition', '')
+        download = _PartialDownload(self, fid)
+        while True:
+            headers = download.request_headers()
             try:
-                filename = cgi.parse_header(header)[1]['filename']
-            except Exception:
-                filename = 'error.txt'
-                print ('''File Handling Area, looking for Content-Disposition Header and Lacks a 'header'...''')
-                print('Expected a "filename" entry in the Content-Disposition header found:\n  {}'.format(header))
-                print('See log file for further detail.')
-                logging.error(str(record['dataset']) + ' ' + str(supplied_url) + ' ' + ' ' + str(params) + ' ' + ('Expected a "filename" entry in the Content-Disposition header found:\n  {}'.format(header)))
-                pass
-                             
-            dest_path = os.path.join(self.path, record['dataset'])
-            if not os.path.exists(dest_path):
-                try:
-                    os.makedirs(dest_path)
-                except:
-                    pass
-            abs_path = os.path.join(dest_path, os.path.basename(filename))
-            with open(abs_path, 'wb') as target:
-                try:
-                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
-                        if chunk:
-                            target.write(chunk)
-                            target.flush()
-                except:
-                    pass
+                response = self._call_api('download', download.params, stream=True, headers=headers)
+            except requests.exceptions.RequestException as exc:
+                time.sleep(download.failed(exc, self._controller))
+                continue
+            try:
+                if not download.check_response(response.status_code, response.headers):
+                    continue
+                target = download.open_part(response.status_code, response.headers)
+                if target is not None:
+                    with target:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            if chunk:
+                                target.write(chunk)
+                return download.finish()
+            except (requests.exceptions.RequestException, RequestError) as exc:
+                time.sleep(download.failed(exc, self._controller))
+            finally:
+                # It would be more convenient to use the context manager idiom,
+                # but avoiding it allows us to support older versions of requests.
+                response.close()
+
+    def _download_quietly(self, fid, sink=None):
+        # Used when downloading many files, so that one failure does not
+        # prevent the remaining files from being fetched.
+        try:
+            path = self.download_file(fid)
+        except RequestError as exc:
+            logger.error(str(exc))
+            logging.error(str(exc))
+            return None
+        if sink is not None:
+            sink(fid, path)
+        return path
+
+    def _download_adaptively(self, fid, sink=None):
+        # Each thread waits for the controller's permission before starting
+        controller = self._controller
+        controller.acquire()
+        start = time.time()
+        path = None
+        try:
+            path = self._download_quietly(fid, sink)
         finally:
-            # It would be more convenient to use the context manager idiom,
-            # but avoiding it allows us to support older versions of requests.
-            response.close()
+            # Release the slot whatever happens, or the other threads wait for it forever
+            nbytes = os.path.getsize(path) if path and os.path.exists(path) else 0
+            controller.release(nbytes, time.time() - start, error=path is None)
+        return path
+
+    def _transcode(self, fid, path, format='parquet', keep=True):
+        """Write a typed columnar copy of a downloaded file, using the loader
+           registered for its dataset. Files without a loader are left alone."""
+        dataset = self.data_catalog[fid]['dataset']
+        if dataset not in Loader.datasets():
+            return
+        try:
+            target = Loader.by_name(dataset)._using(self.parse_engine).transcode(path, format, keep)
+        except Exception as exc:
+            logger.error('transcode: {} could not be converted to {}: {}'.format(path, format, exc))
+            return
+        self.manifest.transcoded(fid, os.path.basename(target))
 
-    def download_data(self, dataset=None):
+    def download_data(self, dataset=None, force=False, engine=None, concurrency=None, adaptive=None,
+                      start=None, end=None, pattern=None, transcode=None, keep_source=True):
         """Download the entire catalog or a specific dataset to the local directory.
 
+        Files already recorded as complete in the download manifest, and
+        whose size has not changed in the catalog, are skipped.
+
         :type dataset: string, or None
         :param dataset: The specific CME Datamine dataset name as retreived from catalog.
                         If None, the entire catalog is downloaded.
-        """
 
-        fids = [fid for fid, record in self.data_catalog.items()
-                if dataset is None or record['dataset'] == dataset]
+        :type force: bool
+        :param force: Set to True to download every file, even those already on disk.
+
+        :type engine: string, or None
+        :param engine: 'thread' to download with a pool of threads, or 'asyncio' to
+                       use a single event loop, which requires the aiohttp package.
+                       Defaults to the engine given to the constructor.
+
+        :type concurrency: int, or None
+        :param concurrency: The number of simultaneous downloads. Defaults to the number
+                            of threads for the thread engine, and 100 for asyncio. In
+                            adaptive mode, this is the number to start with.
+
+        :type adaptive: bool, or None
+        :param adaptive: Set to True to grow or shrink the number of simultaneous
+                         downloads according to the measured throughput, latency and
+                         error rates. Defaults to the setting given to the constructor.
+
+        :type start: string, date, or None
+        :param start: Only download files published on or after this date (YYYYMMDD).
+
+        :type end: string, date, or None
+        :param end: Only download files published on or before this date (YYYYMMDD).
+
+        :type pattern: string, or None
+        :param pattern: Only download files whose names match this shell-style
+                        pattern, such as '*_ES_*'.
+
+        :type transcode: string, or None
+        :param transcode: 'parquet' or 'feather' to read each file with its dataset's
+                          loader as soon as it is downloaded, and write a typed
+                          columnar copy next to it. Later loads read the copy.
+
+        :type keep_source: bool
+        :param keep_source: Set to False to delete each original file once its
+                            columnar copy has been written.
+        """
+        engine = engine or self.engine
+        adaptive = self.adaptive if adaptive is None else adaptive
+        if engine not in ENGINES:
+            raise RequestError('Invalid download engine: {!r}'.format(engine))
+
+        fids = self.data_catalog.select(dataset, start, end, pattern)
+        if not force:
+            nfids = len(fids)
+            fids = [fid for fid in fids if not self.manifest.is_current(fid, self.data_catalog[fid])]
+            logger.info('download_data: {} of {} files already downloaded, skipping'.format(nfids - len(fids), nfids))
         description = 'downloading {} data'.format(dataset if dataset else 'all datasets')
-        tqdm_execute_tasks(self.download_file, fids, description, self.threads, mode='thread')
+        sink = None
+        if transcode is not None:
+            sink = functools.partial(self._transcode, format=transcode, keep=keep_source)
+        try:
+            if engine == 'asyncio':
+                from .aio import AsyncDownloader, ASYNC_CONCURRENCY, ADAPTIVE_MAX_CONCURRENCY
+                concurrency = concurrency or ASYNC_CONCURRENCY
+                if adaptive:
+                    self._controller = AdaptiveConcurrency(concurrency, maximum=ADAPTIVE_MAX_CONCURRENCY)
+                    concurrency = ADAPTIVE_MAX_CONCURRENCY
+                downloader = AsyncDownloader(self, concurrency, self._controller, sink)
+                paths = run_coroutine(downloader.download_files(fids, description))
+            else:
+                concurrency = concurrency or self.threads
+                download = self._download_quietly
+                if adaptive:
+                    self._controller = AdaptiveConcurrency(concurrency, maximum=ADAPTIVE_MAX_THREADS)
+                    concurrency = ADAPTIVE_MAX_THREADS
+                    download = self._download_adaptively
+                self._mount_adapter(concurrency)
+                if sink is not None:
+                    download = functools.partial(download, sink=sink)
+                paths = tqdm_execute_tasks(download, fids, description, concurrency, mode='thread')
+        finally:
+            self._controller = None
+            self.manifest.save(force=True)
+        nfailed = sum(path is None for path in paths)
+        if nfailed:
+            logger.error('download_data: {} of {} files failed, see log file for details'.format(nfailed, len(fids)))
+
+    def _load_pipelined(self, loader, fids, max_workers=None, queue_size=None, cache=None,
+                        columns=None, filters=None, parse_engine=None, output='pandas', precision=None):
+        """Download files with a pool of threads, handing each one to a pool of
+           processes to be read by the loader as soon as it is complete.
+
+           At most queue_size files (twice the number of processes by default)
+           are downloaded but not yet read, so that downloads cannot run
+           arbitrarily far ahead of the readers. Files already on disk are
+           read without being downloaded again. A FrameCache, columns,
+           filters, a parse engine, an output format and a precision may be
+           given, as for Loader.load.
+
+           :returns: the results of the loader's reader, ordered by filename.
+        """
+        max_workers = max_workers or os.cpu_count() or MAX_WORKERS
+        reader = loader._using(parse_engine)._reader(loader._resolve_cache(cache), columns, filters, output,
+                                                     precision)
+        queue_size = queue_size or 2 * max_workers
+        todo = list(reversed(fids))
+        downloads, parses, frames = {}, {}, []
+        desc = 'downloading and reading {} data'.format(loader.dataset)
+        with ThreadPoolExecutor(max_workers=self.threads) as downloaders, \
+                ProcessPoolExecutor(max_workers=max_workers) as readers, \
+                tqdm(total=len(fids), desc=desc) as progress:
+            try:
+                while todo or downloads or parses:
+                    while todo and len(downloads) < self.threads and len(downloads) + len(parses) < queue_size:
+                        fid = todo.pop()
+                        if self.manifest.is_current(fid, self.data_catalog[fid]):
+                            path = self.manifest.local_path(fid)
+                            parses[readers.submit(reader, path)] = path
+                        else:
+                            downloads[downloaders.submit(self._download_quietly, fid)] = fid
+                    done, _ = wait(list(downloads) + list(parses), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in downloads:
+                            del downloads[future]
+                            path = future.result()
+                            if path is None:
+                                progress.update()
+                            else:
+                                parses[readers.submit(reader, path)] = path
+                        else:
+                            frames.append((parses.pop(future), future.result()))
+                            progress.update()
+            finally:
+                self.manifest.save(force=True)
+        return [frame for _, frame in sorted(frames, key=lambda item: item[0])]
 
     def get_catalog(self, dataset=None, limit=None, refresh=False):
         """Get the list of data files avaliable to you
@@ -163,6 +525,15 @@ class DatamineCon(object):
         have available to your login.  Items are retrieved in groups of 1000
         per the standard call support.
 
+        Unless disabled, the catalog is also kept in a local SQLite cache
+        under path. Once a dataset has been listed completely, later calls,
+        even from other processes, start from the cached records and only
+        page through the listing until they reach records already known.
+        This relies on the listing returning the most recent files first,
+        so the catalog is listed in full again once the last full listing is
+        older than CATALOG_FULL_SYNC_AGE; use refresh=True to list
+        everything again now.
+
         Parameters
         ----------
         :type dataset: string
@@ -172,7 +543,7 @@ class DatamineCon(object):
         :param limit: Limits the amount of catalog items you would like to retrieve.
 
         :type refresh: bool
-        :param refresh: Set to True if you want to force a refresh of the local copy.
+        :param refresh: Set to True if you want to force a full refresh of the local copy.
 
         Creates
         -------
@@ -198,7 +569,7 @@ class DatamineCon(object):
             if self._limit >= 0:
                 reason = 'by request' if refresh else 'for new parameters'
                 logger.debug('get_catalog: refreshing {}'.format(reason))
-            self.data_catalog = {}
+            self.data_catalog = CatalogIndex()
             self._dataset = None
             self._limit = 0
             is_valid = False
@@ -209,7 +580,15 @@ class DatamineCon(object):
 
         params = {}
         duplicates = 0
-        nrecs = len(self.data_catalog)
+        cache = self.catalog_cache
+        synced = cache.last_synced(dataset) if cache is not None and not refresh and limit == NO_LIMIT else None
+        incremental = synced is not None and time.time() - synced < CATALOG_FULL_SYNC_AGE
+        if synced is not None and not incremental:
+            logger.info('get_catalog: last full listing is out of date, listing the catalog in full')
+        if incremental:
+            self.data_catalog = cache.load(dataset)
+            logger.info('get_catalog: {} records loaded from the local cache'.format(len(self.data_catalog)))
+        nrecs = ncached = len(self.data_catalog)
         if dataset:
             params['dataset'] = dataset
         while True:
@@ -235,18 +614,31 @@ class DatamineCon(object):
             self.data_catalog.update((item['fid'], item) for item in files)
             orecs, nrecs = nrecs, len(self.data_catalog)
             duplicates += orecs + len(files) - nrecs
+            if cache is not None:
+                cache.store(files)
 
+            if incremental and nrecs == orecs:
+                logger.debug('get_catalog: no new records, local cache is up to date')
+                limit = NO_LIMIT
+                break
             if not next_url:
                 logger.debug('get_catalog: end of data raeached')
                 limit = NO_LIMIT
                 break
             _, params = _url_params(next_url)
 
-        logger.info('get_catalog: {} records downloaded, {} duplicates, {} saved'.format(nrecs + duplicates, duplicates, nrecs))
+        logger.info('get_catalog: {} records downloaded, {} duplicates, {} saved'.format(nrecs - ncached + duplicates, duplicates, nrecs))
+        if cache is not None and limit == NO_LIMIT and not incremental:
+            # A full listing: forget any records that are no longer listed
+            cache.retain(self.data_catalog, dataset)
+            cache.mark_synced(dataset)
         self._limit = max(limit, len(self.data_catalog))
         self._dataset = dataset
 
-    def load_dataset(self, dataset, download=True, limit=None, dataset_args = {}):
+    def load_dataset(self, dataset, download=True, limit=None, dataset_args = {},
+                     start=None, end=None, pattern=None, pipeline=False, cache=None,
+                     columns=None, filters=None, parse_engine=None, output='pandas', kind=None,
+                     precision=None, memory_budget=None, over_budget='warn', sort=False):
         """Load a dataset, optionally downloading files listed in the catalog.
            Parameters
            ----------
@@ -256,16 +648,186 @@ class DatamineCon(object):
            :param limit: Limit the number of files loaded to the given number.
            :type limit: integer, or None
 
+           :param start: Only load catalog files published on or after this date (YYYYMMDD).
+           :type start: string, date, or None
+
+           :param end: Only load catalog files published on or before this date (YYYYMMDD).
+           :type end: string, date, or None
+
+           :param pattern: Only load catalog files whose names match this shell-style pattern.
+           :type pattern: string, or None
+
+           :param kind: Only load files of this kind, or of any of these kinds, as given
+                        by their names, such as 'p' or 'f' for preliminary or final VOI.
+           :type kind: string, list, or None
+
+           :param pipeline: Read each catalog file as soon as its download completes,
+                            rather than downloading every file first. Only the files
+                            listed in the catalog are loaded.
+           :type pipeline: bool
+
+           :param cache: A datamine.loaders.FrameCache, or True for the default cache,
+                         in which the dataframe read from each file is kept, so that
+                         files that have not changed are not parsed again. An
+                         ArrowCache, or 'arrow' for the default one, keeps them as
+                         Arrow files that are memory-mapped to build the result.
+           :type cache: FrameCache, bool, str, or None
+
+           :param columns: Only load these columns.
+           :type columns: list, or None
+
+           :param filters: Only load the rows that pass all of these filters, each a
+                           (column, operator, value) tuple such as ('Trade Date', '>=', '20200101').
+                           Rows and columns that are not needed are discarded as each
+                           file is read. See Loader.load for the operators.
+           :type filters: list, or None
+
+           :param parse_engine: 'c' to parse CSV files with pandas, or 'pyarrow' to use the
+                                multithreaded Arrow CSV reader. Files it cannot parse are
+                                read with pandas. Defaults to the engine given to the constructor.
+           :type parse_engine: string, or None
+
+           :param output: 'pandas', 'arrow' for a pyarrow Table, or 'polars' for a polars
+                          DataFrame. Files are converted as they are read and combined
+                          as Arrow tables, without building a pandas result.
+           :type output: string
+
+           :param precision: Narrow the numeric columns of each file as it is read: 'float32'
+                             to store floats in single precision, 'int' to store integers in
+                             the smallest type that holds them, and 'nullable' to store
+                             integer columns with missing values as nullable integers,
+                             rather than floats. Pass several in a list, or 'compact' for all.
+           :type precision: string, list, or None
+
+           :param memory_budget: The number of bytes the result may take. It is estimated
+                                 from the first files read, before the others are read.
+                                 Not used with pipeline.
+           :type memory_budget: integer, or None
+
+           :param over_budget: 'warn' to log a warning and load the dataset anyway, 'raise'
+                               to raise a RuntimeError, or 'stream' to return a generator
+                               of dataframes, as iter_dataset does, if the estimate exceeds
+                               memory_budget. 'stream' cannot be combined with sort, which raises a
+                               RuntimeError.
+           :type over_budget: string
+
+           :param sort: Return the rows in time order, whatever the order of the files,
+                        merging the files rather than sorting all the rows again. For
+                        datasets whose loaders have sort_by columns, such as TICK.
+           :type sort: bool
+
            Returns
            -------
-           :returns: pandas.DataFrame
+           :returns: pandas.DataFrame, pyarrow.Table or polars.DataFrame
+        """
+        parse_engine = parse_engine or self.parse_engine
+        if download and pipeline:
+            loader = Loader.by_name(dataset, dataset_args)
+            loader._check_output(output)
+            fids = self.data_catalog.select(dataset, start, end, pattern)
+            if kind is not None:
+                kinds = (kind,) if isinstance(kind, str) else set(kind)
+                fids = [fid for fid in fids
+                        if loader._file_label(self.data_catalog[fid].get('filename') or fid)[1] in kinds]
+            if limit:
+                fids = sorted(fids, key=lambda fid: (self.data_catalog[fid].get('yyyymmdd') or '', fid))[-limit:]
+            cache = loader._resolve_cache(cache)
+            wanted = loader._check_sort(columns, output, cache) if sort else columns
+            frames = self._load_pipelined(loader, fids, cache=cache, columns=wanted, filters=filters,
+                                          parse_engine=parse_engine, output=output, precision=precision)
+            result = loader._assemble(frames, cache, output, sort, columns)
+            return loader._finalize(result) if output == 'pandas' else result
+        if download:
+            self.download_data(dataset, start=start, end=end, pattern=pattern)
+        loader = Loader.by_name(dataset, dataset_args)
+        path = self._local_files(dataset, start, end, pattern, loader)
+        return loader.load(path, limit=limit, cache=cache,
+                           columns=columns, filters=filters,
+                           parse_engine=parse_engine, output=output, kind=kind,
+                           precision=precision, memory_budget=memory_budget,
+                           over_budget=over_budget, sort=sort)
+
+    def iter_dataset(self, dataset, download=True, limit=None, dataset_args={},
+                     start=None, end=None, pattern=None, chunksize=None, cache=None,
+                     columns=None, filters=None, parse_engine=None, kind=None, precision=None):
+        """Generate a dataset a piece at a time, optionally downloading files
+           listed in the catalog first. Only one file, or one chunk, and the
+           few being read ahead of it need be held in memory at once.
+           Parameters
+           ----------
+           :param chunksize: Generate dataframes of this many rows, rather than one
+                             dataframe per file.
+           :type chunksize: integer, or None
+
+           The other parameters are as for load_dataset.
+
+           Returns
+           -------
+           :returns: a generator of pandas.DataFrame
         """
-        
         if download:
-            self.download_data(dataset)
+            self.download_data(dataset, start=start, end=end, pattern=pattern)
+        loader = Loader.by_name(dataset, dataset_args)
+        path = self._local_files(dataset, start, end, pattern, loader)
+        return loader.iter_load(path, limit=limit, chunksize=chunksize, cache=cache,
+                                columns=columns, filters=filters,
+                                parse_engine=parse_engine or self.parse_engine,
+                                kind=kind, precision=precision)
+
+    def query_dataset(self, dataset, start=None, end=None, products=None, columns=None, filters=None,
+                      dataset_args={}, ingest=True, output='pandas'):
+        """Load the rows of a dataset for a range of trade dates, and optionally
+           a set of products, from the local partitioned store, reading only the
+           partitions that match. The store requires pyarrow.
+           Parameters
+           ----------
+           :param start: Only load trade dates on or after this date (YYYYMMDD).
+           :type start: string, date, or None
+
+           :param end: Only load trade dates on or before this date (YYYYMMDD).
+           :type end: string, date, or None
+
+           :param products: Only load these product codes, for datasets partitioned
+                            by product (EOD, VOI, TICK and BLOCK).
+           :type products: string, list, or None
 
-        path = os.path.join(self.path, dataset)
-        return Loader.by_name(dataset, dataset_args).load(path, limit=limit)
+           :param ingest: Add any downloaded files that are new or have changed to the
+                          store first. Files are not downloaded; use download_data.
+           :type ingest: bool
+
+           The columns, filters and output parameters are as for load_dataset.
+
+           Returns
+           -------
+           :returns: pandas.DataFrame, pyarrow.Table or polars.DataFrame
+        """
+        loader = Loader.by_name(dataset, dataset_args)
+        directory = os.path.join(self.path, dataset)
+        if ingest and os.path.isdir(directory):
+            self.store.ingest(loader, directory)
+        return self.store.query(loader, start, end, products, columns=columns, filters=filters, output=output)
+
+    def _local_files(self, dataset, start=None, end=None, pattern=None, loader=None):
+        # The dataset directory, or only the downloaded files selected from the catalog
+        directory = os.path.join(self.path, dataset)
+        if start is None and end is None and pattern is None:
+            return directory
+        fids = self.data_catalog.select(dataset, start, end, pattern)
+        paths = [self.manifest.local_path(fid) for fid in fids
+                 if self.manifest.is_current(fid, self.data_catalog[fid])]
+        if not fids or len(paths) < len(fids):
+            # The catalog is not loaded, or files were downloaded without being
+            # recorded in the manifest: select the files on disk by the dates
+            # in their names instead
+            loader = loader or Loader.by_name(dataset)
+            on_disk = loader._filenames(directory, start=start, end=end) if os.path.isdir(directory) else []
+            if pattern is not None:
+                on_disk = [fname for fname in on_disk if fnmatch.fnmatch(os.path.basename(fname), pattern)]
+            paths = set(paths).union(on_disk)
+        if not paths:
+            raise RuntimeError('No {} files found in {} from {} to {} matching {}'.format(
+                dataset, directory, start, end, pattern))
+        return sorted(paths)
 
     '''
     Script consists of "load" and "download" functions.
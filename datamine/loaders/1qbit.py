@@ -1,9 +1,141 @@
 from . import Loader
+import numpy as np
 import pandas as pd
 
+# The mixture distribution of each row, from the lowest bin to the highest
+MIX_BINS = (['MIX_BIN_NEG_{:02d}'.format(i) for i in range(100, 0, -1)] +
+            ['MIX_BIN_POS_{:02d}'.format(i) for i in range(156)])
+DISTANCES = ('wasserstein', 'l1', 'hellinger')
+
+
+class MixHistogram(object):
+    """
+    The MIX_BIN columns of a 1QBIT dataframe, held as one contiguous array
+    of rows x bins rather than as 256 separate columns.
+
+    Bin j of a row spans MIX_LOW_BIN + j * MIX_BIN_SIZE to the start of the
+    next bin. The statistics treat the values of each row as weights, scaled
+    to sum to one, and are NaN for rows without any. frame holds the other
+    columns, and the index.
+    """
+
+    def __init__(self, frame, values, low, width):
+        self.frame = frame
+        self.values = values
+        self.low = low
+        self.width = width
+
+    @classmethod
+    def from_frame(cls, df, dtype='float32'):
+        '''Move the MIX_BIN columns of a dataframe into an array of dtype.'''
+        # Columns that were not loaded are NaN
+        values = np.ascontiguousarray(df.reindex(columns=MIX_BINS).to_numpy(dtype=dtype, na_value=np.nan))
+        low, width = (df[col].to_numpy(dtype='float64', na_value=np.nan) if col in df else np.full(len(df), np.nan)
+                      for col in ('MIX_LOW_BIN', 'MIX_BIN_SIZE'))
+        return cls(df.drop(columns=MIX_BINS, errors='ignore'), values, low, width)
+
+    @classmethod
+    def concat(cls, histograms):
+        '''Combine MixHistograms, such as those built from each dataframe
+           generated by iter_dataset.'''
+        histograms = list(histograms)
+        if not histograms:
+            raise RuntimeError('No MixHistograms to combine')
+        return cls(pd.concat([h.frame for h in histograms]),
+                   *(np.concatenate([getattr(h, name) for h in histograms]) for name in ('values', 'low', 'width')))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def edges(self):
+        '''Return the edges of the bins, as an array of rows x (bins + 1).'''
+        return self.low[:, None] + np.arange(len(MIX_BINS) + 1) * self.width[:, None]
+
+    def centers(self):
+        '''Return the midpoints of the bins, as an array of rows x bins.'''
+        return self.low[:, None] + (np.arange(len(MIX_BINS)) + 0.5) * self.width[:, None]
+
+    def probabilities(self):
+        '''Return the values of each row scaled to sum to one, in float64.'''
+        values = np.nan_to_num(self.values.astype('float64'))
+        total = values.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, values / total, np.nan)
+
+    def moments(self):
+        '''Return the mean, standard deviation, skewness and kurtosis (not
+           excess) of each row, computed at the bin midpoints, as a dataframe.'''
+        probs, centers = self.probabilities(), self.centers()
+        mean = (probs * centers).sum(axis=1)
+        deviations = centers - mean[:, None]
+        var = (probs * deviations ** 2).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            skew = (probs * deviations ** 3).sum(axis=1) / var ** 1.5
+            kurtosis = (probs * deviations ** 4).sum(axis=1) / var ** 2
+        return pd.DataFrame({'mean': mean, 'std': np.sqrt(var), 'skew': skew, 'kurtosis': kurtosis},
+                            index=self.frame.index)
+
+    def quantile(self, q):
+        '''Return the q-th quantile of each row, interpolating linearly
+           within the bin it falls in. q may be a number, giving a Series, or
+           a list of them, giving a dataframe with a column for each.'''
+        qs = np.atleast_1d(np.asarray(q, dtype='float64'))
+        if ((qs < 0) | (qs > 1)).any():
+            raise RuntimeError('Quantiles must be between 0 and 1: {}'.format(q))
+        probs = self.probabilities()
+        cdf = np.cumsum(probs, axis=1)
+        rows = np.arange(len(probs))
+        result = np.empty((len(probs), len(qs)))
+        for k, value in enumerate(qs):
+            # The first bin with any weight whose cumulative weight reaches
+            # the quantile, so that empty bins at either end are skipped
+            bins = np.argmax((cdf >= value - 1e-12) & (probs > 0), axis=1)
+            before = np.where(bins > 0, cdf[rows, bins - 1], 0)
+            weight = probs[rows, bins]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fraction = np.clip(np.where(weight > 0, (value - before) / weight, 0), 0, 1)
+            result[:, k] = self.low + (bins + fraction) * self.width
+        result[np.isnan(cdf[:, -1])] = np.nan
+        if np.ndim(q) == 0:
+            return pd.Series(result[:, 0], index=self.frame.index, name=q)
+        return pd.DataFrame(result, index=self.frame.index, columns=list(q))
+
+    def distance(self, other, metric='wasserstein'):
+        '''Return the distance between each row and the matching row of
+           other, a MixHistogram of the same length, or an array of
+           probabilities, of rows x bins or of one row for all. The rows are
+           compared bin by bin, so they should share the same bins.
+
+           :param metric: 'wasserstein', the earth mover's distance in the
+                          units of the bins, 'l1', the sum of the absolute
+                          differences of the probabilities, or 'hellinger'.
+        '''
+        if metric not in DISTANCES:
+            raise RuntimeError('Unsupported metric: {}'.format(metric))
+        probs = self.probabilities()
+        others = other.probabilities() if isinstance(other, MixHistogram) else np.asarray(other, dtype='float64')
+        if metric == 'wasserstein':
+            result = np.abs(np.cumsum(probs, axis=1) - np.cumsum(others, axis=-1)).sum(axis=1) * self.width
+        elif metric == 'l1':
+            result = np.abs(probs - others).sum(axis=1)
+        else:
+            result = np.sqrt(0.5 * ((np.sqrt(probs) - np.sqrt(others)) ** 2).sum(axis=1))
+        return pd.Series(result, index=self.frame.index, name=metric)
+
+    def to_frame(self):
+        '''Return the other columns followed by the MIX_BIN columns, of the
+           dtype of the array, as a dataframe.'''
+        return pd.concat([self.frame, pd.DataFrame(self.values, index=self.frame.index, columns=MIX_BINS)], axis=1)
+
+
 class OneQBitLoader(Loader):
     dataset = '1QBIT'
     fileglob = '1QBit_*.csv'
+    partition_date = 'TRADEDATE'
+    # Nearly all of the columns are numbers, which read_csv infers as
+    # float64 anyway, so passing the dtypes to it saves nothing; see
+    # benchmarks/parse_dtypes.py
+    parse_dtypes = False
 
     columns = ['TRADEDATE', 'DATA_SOURCE', 'EODDESC', 'CHART_TITLE', 
                'YYYY', 'MM', 'DD', 'DATECODE_EXCEL', 'DATE_LABEL', 'F_PROD_CODE', 'O_PROD_CODE', 
@@ -129,8 +261,15 @@ class OneQBitLoader(Loader):
               'date': ('DATE_LABEL'),
              'date:%Y%m%d': ('TRADEDATE')}
 
-    def _load(self, file):
-        df = pd.read_csv(file, skiprows = [1,2], low_memory=False)
+    def _load(self, file, usecols=None):
+        # The header is replaced by columns, so read the file without it,
+        # which lets the columns be selected by position
+        df = self._read_csv(file, usecols, skiprows = [0,1,2])
         return df
 
+    def to_histogram(self, df, dtype='float32'):
+        '''Return the MixHistogram of a dataframe loaded from this dataset,
+           with the MIX_BIN columns as an array of dtype.'''
+        return MixHistogram.from_frame(df, dtype)
+
 oneqbitloader = OneQBitLoader()
@@ -1 +1 @@
-from .base import Loader
+from .base import Loader, FrameCache, ArrowCache
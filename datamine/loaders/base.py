@@ -1,13 +1,583 @@
 import pandas as pd
+import numpy as np
 import os
 import glob
 import sys
+import hashlib
+import functools
+import copy
+import numbers
+import operator
+import re
+import gzip
+import itertools
+import json
+import threading
 
 from importlib import import_module
 from importlib import reload
-from ..utils import tqdm_execute_tasks, logger
+from pandas.api.types import union_categoricals
+from ..utils import tqdm_execute_tasks, tqdm_iterate_tasks, logger, MAX_WORKERS
+from ..catalog import _yyyymmdd
 
-__all__ = ['Loader']
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.feather
+    import pyarrow.parquet
+    import pyarrow.csv
+    import pyarrow.json
+    import pyarrow.compute
+except ImportError:
+    pa = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ['Loader', 'FrameCache', 'ArrowCache', 'COLUMNAR_FORMATS', 'PARSE_ENGINES', 'OUTPUT_FORMATS', 'PRECISIONS']
+
+# Typed copies of downloaded files are written alongside them, with
+# one of these formats appended to the original filename
+COLUMNAR_FORMATS = ('parquet', 'feather')
+
+# The key under which a columnar copy records the schema of the loader that
+# wrote it; copies written for another schema are not read
+COLUMNAR_SCHEMA_KEY = b'datamine.schema'
+
+# The engines that may be used to parse CSV files: the pandas C parser, or
+# the multithreaded Arrow CSV reader, which requires pyarrow
+PARSE_ENGINES = ('c', 'pyarrow')
+
+# The kinds of result that Loader.load can return: a pandas DataFrame, a
+# pyarrow Table, or a polars DataFrame, the last two requiring pyarrow
+OUTPUT_FORMATS = ('pandas', 'arrow', 'polars')
+
+# The ways in which Loader.load may narrow numeric columns: float64 to
+# float32, int64 to the smallest integer type that holds the values, and
+# columns declared as integers but read as floats, because values are
+# missing, to nullable integers; 'compact' selects all three
+PRECISIONS = ('float32', 'int', 'nullable')
+
+# The number of lines of a JSON lines file decoded at once by _iter_ndjson
+NDJSON_CHUNKSIZE = 100000
+
+# The comparisons that may be used in the filters passed to Loader.load
+FILTER_OPERATORS = {'==': operator.eq, '=': operator.eq, '!=': operator.ne,
+                    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+                    'in': lambda col, value: col.isin(value),
+                    'not in': lambda col, value: ~col.isin(value)}
+
+# Date strings already parsed by _to_datetime, keyed by format, so that the
+# dates shared by the files read in a process are parsed only once. Files
+# may be read by several threads, which take the lock to use the memo; each
+# format keeps at most PARSED_DATES_SIZE values before it is cleared
+_PARSED_DATES = {}
+_PARSED_DATES_LOCK = threading.Lock()
+PARSED_DATES_SIZE = 100000
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.datamine', 'cache')
+DEFAULT_CACHE_BYTES = 4 * 1024 ** 3
+
+
+def _filter_mask(df, filters):
+    '''Return a boolean Series selecting the rows that pass every filter.'''
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        if op not in FILTER_OPERATORS:
+            raise RuntimeError('Unsupported filter operator: {}'.format(op))
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series) and op not in ('in', 'not in'):
+            # Allow dates to be compared with strings, dates and naive timestamps
+            value = pd.Timestamp(value)
+            tz = getattr(series.dtype, 'tz', None)
+            if tz is not None and value.tzinfo is None:
+                value = value.tz_localize(tz)
+        mask &= FILTER_OPERATORS[op](series, value)
+    return mask
+
+
+def _parse_dates(values, format=None):
+    '''Return pd.to_datetime(values, format=format, utc=True), or None if
+       any value is not a date in that format.'''
+    try:
+        return pd.to_datetime(values, format=format, utc=True)
+    except (ValueError, TypeError, OverflowError):
+        # Including DateParseError and OutOfBoundsDatetime
+        return None
+
+
+def _to_datetime(series, format=None):
+    '''Convert a column to UTC datetimes with pd.to_datetime, or return it
+       unchanged if any of its values is not a date in the given format.
+
+       Each distinct value is parsed once, and mapped back to the rows
+       through the codes of pd.factorize. Values parsed for earlier columns
+       with the same explicit format are remembered, and not parsed again.'''
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return pd.to_datetime(series, utc=True)
+    codes, uniques = pd.factorize(series)
+    if len(uniques) > len(series) // 2:
+        # Mostly distinct values, such as timestamps, gain nothing
+        parsed = _parse_dates(series, format)
+        return series if parsed is None else parsed
+    # Without a format, the format is inferred from each column
+    found = {}
+    try:
+        if format is not None:
+            # The values are copied out, as another thread may clear the memo
+            with _PARSED_DATES_LOCK:
+                known = _PARSED_DATES.setdefault(format, {})
+                found = dict((value, known[value]) for value in uniques if value in known)
+        todo = [value for value in uniques if value not in found]
+    except TypeError:
+        # Unhashable values
+        parsed = _parse_dates(series, format)
+        return series if parsed is None else parsed
+    if todo:
+        parsed = _parse_dates(pd.Index(todo, dtype=uniques.dtype), format)
+        if parsed is None:
+            # Some values are not dates, so the column is left as it is
+            return series
+        found.update(zip(todo, parsed))
+        if format is not None and len(todo) <= PARSED_DATES_SIZE:
+            with _PARSED_DATES_LOCK:
+                known = _PARSED_DATES.setdefault(format, {})
+                if len(known) + len(todo) > PARSED_DATES_SIZE:
+                    known.clear()
+                known.update(zip(todo, parsed))
+    # The last entry, NaT, is selected by the code -1 of missing values
+    dates = pd.DatetimeIndex([found[value] for value in uniques] + [pd.NaT], tz='UTC')
+    return pd.Series(dates[codes], index=series.index, name=series.name)
+
+
+def _chain_results(first, rest):
+    '''Yield the given results, then those of the generator rest, which is
+       closed if the caller stops early.'''
+    yield from first
+    yield from rest
+
+
+def _precision(precision):
+    '''Return the set of PRECISIONS selected by the precision argument of Loader.load.'''
+    if precision is None:
+        return frozenset()
+    if precision == 'compact':
+        return frozenset(PRECISIONS)
+    precision = frozenset((precision,) if isinstance(precision, str) else precision)
+    unknown = precision.difference(PRECISIONS)
+    if unknown:
+        raise RuntimeError('Unsupported precision: {}'.format(', '.join(sorted(unknown))))
+    return precision
+
+
+def _smallest_int(values, nullable=False):
+    '''Return the smallest integer dtype that holds the minimum and maximum of the values.'''
+    low, high = values.min(), values.max()
+    for dtype in ('int8', 'int16', 'int32', 'int64'):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype.capitalize() if nullable else dtype
+    return None
+
+
+def _numeric_categories(df, cols):
+    '''read_csv parses categories as strings. Give the given categorical columns
+       numeric categories instead if every category is a number, as they would
+       have had if the column had been parsed and then converted.'''
+    for col in cols:
+        if col not in df:
+            continue
+        categories = df[col].cat.categories
+        if categories.empty or pd.api.types.is_numeric_dtype(categories):
+            continue
+        numbers = pd.to_numeric(categories, errors='coerce')
+        if numbers.isna().any():
+            continue
+        if pd.api.types.is_integer_dtype(numbers) and df[col].isna().any():
+            numbers = numbers.astype('float64')
+        if numbers.is_unique:
+            df[col] = df[col].cat.rename_categories(numbers).cat.reorder_categories(numbers.sort_values())
+        else:
+            # Distinct strings for the same number, such as 1 and 1.0
+            df[col] = pd.to_numeric(df[col].astype(object)).astype('category')
+
+
+def _read_arrow_csv(filename, header=None, dtype=None, usecols=None, skiprows=None, **kwargs):
+    '''Read a CSV file, which may be compressed, with the Arrow CSV reader,
+       returning a dataframe labelled and typed as pd.read_csv would return
+       it. Values that Arrow recognises as dates or times are left as strings.
+
+       Raises ValueError, or one of its subclasses such as ArrowInvalid, for
+       files and options the reader does not support, in which case the
+       file should be read with pandas instead.
+    '''
+    if kwargs:
+        raise ValueError('unsupported options: {}'.format(', '.join(sorted(kwargs))))
+    if skiprows is None:
+        skiprows = 0
+    elif not isinstance(skiprows, numbers.Integral):
+        if list(skiprows) != list(range(len(skiprows))):
+            raise ValueError('only leading rows can be skipped')
+        skiprows = len(skiprows)
+    read_options = pa.csv.ReadOptions(skip_rows=skiprows, autogenerate_column_names=header is None)
+    dtype = dict((col, value) for col, value in (dtype or {}).items() if value in ('category', 'float'))
+    if header is None:
+        # Generated names are f0, f1, ... in the order of the columns of the file
+        name = 'f{}'.format
+    else:
+        # Columns may be given by name, or by position as pandas allows
+        header = None
+        if callable(usecols) or any(isinstance(col, numbers.Integral) for col in dtype):
+            with pa.csv.open_csv(filename, read_options=read_options) as reader:
+                header = reader.schema.names
+
+        def name(col):
+            if isinstance(col, numbers.Integral):
+                return header[col] if col < len(header) else None
+            return col
+    if callable(usecols):
+        usecols = [col for col in header if usecols(col)]
+    types = dict((name(col), pa.dictionary(pa.int32(), pa.string()) if value == 'category' else pa.float64())
+                 for col, value in dtype.items())
+    types.pop(None, None)
+    convert_options = pa.csv.ConvertOptions(
+        column_types=types, strings_can_be_null=True,
+        include_columns=None if usecols is None else [name(col) for col in usecols])
+    table = pa.csv.read_csv(filename, read_options=read_options, convert_options=convert_options)
+    names = table.column_names
+    if len(set(names)) != len(names):
+        raise ValueError('duplicate column names')
+    for i, field in enumerate(table.schema):
+        # pandas reads empty columns as floats, and leaves dates and times as strings
+        if pa.types.is_null(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+        elif pa.types.is_temporal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    df = table.to_pandas()
+    for col, value in dtype.items():
+        if value == 'category' and name(col) in df:
+            # Arrow orders the categories as they appear, pandas sorts them
+            df[name(col)] = df[name(col)].cat.reorder_categories(df[name(col)].cat.categories.sort_values())
+    if read_options.autogenerate_column_names:
+        df.columns = [int(col[1:]) for col in names]
+    return df
+
+
+def _json_loads(data):
+    '''Decode JSON bytes, with orjson if it is installed.'''
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _open_json(filename):
+    '''Open a file for reading bytes, decompressing it if it is gzipped.'''
+    with open(filename, 'rb') as f:
+        gzipped = f.read(2) == b'\x1f\x8b'
+    return gzip.open(filename, 'rb') if gzipped else open(filename, 'rb')
+
+
+def _iter_ndjson(filename, record_path, chunksize=NDJSON_CHUNKSIZE):
+    '''Generate the records found under record_path in each object of a
+       JSON lines file, which may be gzipped, in lists made from up to
+       chunksize lines, so that only a chunk of decoded records is held at
+       once. The objects themselves are discarded as each line is decoded.'''
+    with _open_json(filename) as f:
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if not lines:
+                return
+            yield [record for line in lines if line.strip()
+                   for record in (_json_loads(line).get(record_path) or ())]
+
+
+def _read_ndjson(filename, record_path, chunksize=NDJSON_CHUNKSIZE, last=False, normalize=False):
+    '''Read the lists of records found under record_path in each object of
+       a JSON lines file into a dataframe, with a row for every record.
+
+       :param last: Only read the records of the last line of the file. The
+                    other lines are not decoded.
+       :param normalize: Flatten the fields of nested objects into columns, as
+                         pd.json_normalize does, which is slower.
+    '''
+    if last:
+        line = None
+        with _open_json(filename) as f:
+            for text in f:
+                if text.strip():
+                    line = text
+        chunks = [_json_loads(line).get(record_path) or []] if line is not None else []
+    else:
+        chunks = _iter_ndjson(filename, record_path, chunksize)
+    frames = [pd.json_normalize(records) if normalize else pd.DataFrame(records) for records in chunks if records]
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def _read_arrow_ndjson(filename, record_path):
+    '''Read the lists of records found under record_path in each object of
+       a JSON lines file, which may be gzipped, with the multithreaded Arrow
+       JSON reader, returning a dataframe with a row for every record.
+
+       Raises ArrowInvalid for files whose values the reader cannot reconcile,
+       such as fields that are numbers in some lines and strings in others,
+       in which case the file should be read with _read_ndjson instead.
+    '''
+    with open(filename, 'rb') as f:
+        compression = 'gzip' if f.read(2) == b'\x1f\x8b' else None
+    table = pa.json.read_json(pa.input_stream(filename, compression=compression))
+    if record_path not in table.column_names:
+        return pd.DataFrame()
+    records = pa.compute.list_flatten(table.column(record_path))
+    if not pa.types.is_struct(records.type):
+        raise pa.ArrowInvalid('{} is not a list of objects'.format(record_path))
+    return pa.Table.from_arrays(records.flatten(), names=[field.name for field in records.type]).to_pandas()
+
+
+def _sort_keys(frame, keys):
+    '''Return the key columns of a dataframe as int64 arrays, or None if any
+       is not an integer or datetime column without missing values.'''
+    arrays = []
+    for key in keys:
+        values = frame[key]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.array.asi8 if hasattr(values.array, 'asi8') else values.values.view('int64')
+            if (values == np.iinfo('int64').min).any():
+                return None
+        elif pd.api.types.is_integer_dtype(values) and not values.hasnans:
+            values = values.to_numpy(dtype='int64')
+        else:
+            return None
+        arrays.append(np.asarray(values, dtype='int64'))
+    return arrays
+
+
+def _pack_keys(arrays):
+    '''Combine columns of int64 keys into one int64 key with the same order,
+       or return None if their combined range does not fit.'''
+    packed, width = None, 1
+    for values in arrays:
+        low = int(values.min())
+        # Timestamps of whole seconds span far fewer steps than nanoseconds
+        step = int(np.gcd.reduce(values - low)) or 1
+        span = (int(values.max()) - low) // step + 1
+        if width * span >= 2 ** 63:
+            return None
+        values = (values - low) // step
+        packed = values if packed is None else packed * span + values
+        width *= span
+    return packed
+
+
+def _merge_order(frames, keys):
+    '''Return the order in which to concatenate dataframes, each sorted by
+       keys, and the positions of the rows of that concatenation in the order
+       of the keys, or None for the positions if it is already in order.
+       Returns None if the keys are not integer or datetime columns without
+       missing values, in which case the rows must be sorted instead.
+
+       The dataframes are placed in the order of their first keys. Only the
+       rows of those whose ranges of keys overlap are merged: their keys are
+       packed into one int64 and sorted with a stable sort, which numpy
+       performs as a timsort that merges the already sorted runs.
+    '''
+    arrays = [_sort_keys(frame, keys) for frame in frames]
+    if any(keyed is None for keyed in arrays):
+        return None
+    bounds = [(tuple(int(a[0]) for a in keyed), tuple(int(a[-1]) for a in keyed)) for keyed in arrays]
+    order = sorted(range(len(frames)), key=lambda i: bounds[i][0])
+    # Runs of consecutive dataframes whose ranges of keys overlap
+    groups, last = [], None
+    for i in order:
+        if groups and bounds[i][0] < last:
+            groups[-1].append(i)
+            last = max(last, bounds[i][1])
+        else:
+            groups.append([i])
+            last = bounds[i][1]
+    if all(len(group) == 1 for group in groups):
+        return order, None
+    positions, offset = [], 0
+    for group in groups:
+        size = sum(len(frames[i]) for i in group)
+        if len(group) > 1:
+            merged = [np.concatenate([arrays[i][k] for i in group]) for k in range(len(keys))]
+            packed = _pack_keys(merged)
+            if packed is not None:
+                group_order = np.argsort(packed, kind='stable')
+            else:
+                group_order = np.lexsort(merged[::-1])
+            positions.append(group_order + offset)
+        else:
+            positions.append(np.arange(offset, offset + size))
+        offset += size
+    return order, np.concatenate(positions)
+
+
+def _unify_categories(frames, cols):
+    '''Give the given categorical columns the same categories in every frame,
+       so that pd.concat keeps them categorical rather than reverting to object
+       dtype. Only the codes are remapped; the strings are not hashed again.
+       Columns that are missing from, or not categorical in, any of the frames
+       are left as they are.'''
+    unified = {}
+    for col in cols:
+        if not all(col in frame and isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            continue
+        try:
+            union = union_categoricals([pd.Categorical([], dtype=frame[col].dtype) for frame in frames],
+                                       sort_categories=True)
+        except TypeError:
+            # Categories of different types, such as numbers and strings
+            continue
+        unified[col] = union.dtype
+    if not unified:
+        return frames
+    result = []
+    for frame in frames:
+        changed = dict((col, dtype) for col, dtype in unified.items() if frame[col].dtype != dtype)
+        if changed:
+            frame = frame.copy(deep=False)
+            for col, dtype in changed.items():
+                frame[col] = frame[col].cat.set_categories(dtype.categories)
+        result.append(frame)
+    return result
+
+
+def _freeze(value):
+    '''Return a representation of columns or filters that is the same in every process.'''
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return [_freeze(item) for item in value]
+    return repr(value)
+
+
+class FrameCache(object):
+    '''A directory of parsed dataframes, keyed by the fingerprint of the
+       file each was read from: its path, size and modification time, and
+       the schema of the loader that read it. A file that has not changed
+       since it was last loaded is read back from the cache rather than
+       parsed again.
+
+       The cache is limited to max_bytes, and to max_files if given. When
+       it grows beyond either, the least recently used entries are evicted.
+    '''
+
+    suffix = '.pkl'
+
+    def __init__(self, path=None, max_bytes=DEFAULT_CACHE_BYTES, max_files=None):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+
+    def key(self, loader, filename, *options):
+        stat = os.stat(filename)
+        fingerprint = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns, loader._schema(),
+                       _freeze(options))
+        return hashlib.sha1(repr(fingerprint).encode('utf-8')).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.path, key + self.suffix)
+
+    def get(self, key):
+        entry = self._entry(key)
+        try:
+            df = pd.read_pickle(entry)
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.warning('cache: discarding unreadable entry {}: {}'.format(entry, exc))
+            os.remove(entry)
+            return None
+        # The modification time records when the entry was last used
+        os.utime(entry)
+        return df
+
+    def put(self, key, df):
+        os.makedirs(self.path, exist_ok=True)
+        entry = self._entry(key)
+        temp = '{}.{}.tmp'.format(entry, os.getpid())
+        df.to_pickle(temp)
+        os.replace(temp, entry)
+
+    def evict(self):
+        '''Remove the least recently used entries until the cache is within its limits.'''
+        if not os.path.isdir(self.path):
+            return
+        entries = []
+        for fname in glob.glob(os.path.join(self.path, '*' + self.suffix)):
+            try:
+                stat = os.stat(fname)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, fname))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, fname in entries:
+            if total <= self.max_bytes and (self.max_files is None or count <= self.max_files):
+                break
+            try:
+                os.remove(fname)
+            except OSError:
+                continue
+            total -= size
+            count -= 1
+
+
+class ArrowCache(FrameCache):
+    '''A FrameCache that stores each dataframe as an uncompressed Arrow IPC
+       (Feather version 2) file, which requires pyarrow.
+
+       Loads that use this cache pass only the cache keys between processes.
+       The parent memory-maps the cached files and assembles the composite
+       dataframe from them directly, so that the data is copied once, into
+       the final dataframe, rather than being pickled, unpickled and then
+       copied again by concatenation. The files are written by whichever
+       process parses the data, and can be mapped by any other process.
+    '''
+
+    suffix = '.arrow'
+
+    def __init__(self, path=None, max_bytes=DEFAULT_CACHE_BYTES, max_files=None):
+        if pa is None:
+            raise RuntimeError('ArrowCache requires the pyarrow package')
+        super(ArrowCache, self).__init__(path, max_bytes, max_files)
+
+    def open(self, key):
+        '''Return the cached table, memory-mapped, or None if there is no valid entry.'''
+        entry = self._entry(key)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(entry)).read_all()
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.warning('cache: discarding unreadable entry {}: {}'.format(entry, exc))
+            os.remove(entry)
+            return None
+        os.utime(entry)
+        return table
+
+    def get(self, key):
+        table = self.open(key)
+        return None if table is None else table.to_pandas()
+
+    def put(self, key, df):
+        os.makedirs(self.path, exist_ok=True)
+        entry = self._entry(key)
+        temp = '{}.{}.tmp'.format(entry, os.getpid())
+        table = pa.Table.from_pandas(df, preserve_index=not isinstance(df.index, pd.RangeIndex))
+        with pa.OSFile(temp, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp, entry)
 
 
 class Loader(object):
@@ -16,13 +586,37 @@ class Loader(object):
     dataset = None
     dataset_args = None
     fileglob = '*.csv'
+    # Searched for in the name of each file: the named groups date (YYYYMMDD)
+    # and kind, where present, label the file for _file_index
+    filename_pattern = r'(?P<date>(?:19|20)\d{6})'
     index = None
+    # The position in columns of the first column of the file, for loaders
+    # that insert derived columns before those that are read
+    column_offset = 0
+    # Apply the dtypes as files are parsed, rather than converting each
+    # column afterwards; see _parse_dtypes
+    parse_dtypes = True
+    # The engine used by _read_csv, one of PARSE_ENGINES; see _using
+    parse_engine = 'c'
+    # The columns by which a PartitionedStore lays out the dataset: a trade
+    # date, and optionally a product
+    partition_date = None
+    partition_product = None
+    # The columns by which load(sort=True) sorts each file that is not
+    # already in order, and then merges the files; see _merge_order
+    sort_by = None
+    # Increment when a change to a loader alters the dataframes it
+    # produces, so that cached copies are not reused
+    schema_version = 1
+    cache = None
 
     _by_name = None
 
     @classmethod
     def _load_datasets(cls):
-        cls._by_name = {}
+        # Build the registry before publishing it, so that other threads
+        # never see it partially populated
+        by_name = {}
         pkg = __name__.rsplit('.', 1)[0]
         fpath, base = os.path.split(__file__)
         for fname in glob.glob(os.path.join(fpath, '*.py')):
@@ -34,11 +628,12 @@ class Loader(object):
                 if isinstance(value, cls):
                     if not isinstance(value.dataset, str):
                         raise RuntimeError('Invalid Loader: dataset must be a string, not {}'.format(type(value.dataset)))
-                    elif value.dataset in cls._by_name:
+                    elif value.dataset in by_name:
                         raise RuntimeError('Invalid Loader: duplicate loader for {} dataset'.format(value.dataset))
                     else:
-                        cls._by_name[value.dataset] = value
+                        by_name[value.dataset] = value
                         # {'BLOCK' : <datamine.loaders.block.BlockLoader object at 0x0000026E3AE01DD8>}
+        cls._by_name = by_name
 
     @classmethod
     def datasets(cls):
@@ -55,7 +650,8 @@ class Loader(object):
             raise RuntimeError('Dataset not found: {}'.format(dataset))
         return cls._by_name[dataset]
     
-    def _set_dtypes(self, df):
+    def _set_dtypes(self, df, only=None):
+        '''Coerce the datatypes of the columns, or of those in only, in place.'''
         if self.dtypes is None:
             return
         
@@ -69,62 +665,735 @@ class Loader(object):
                 logger.error(("Mismatched column names & dtypes. Mismatches:", set(self.columns).difference(column_check)))
         for dtype, cols in self.dtypes.items():
             for col in ((cols,) if isinstance(cols, str) else cols):
-                if col in df:
+                if col in df and (only is None or col in only):
+                    if not dtype.startswith('date') and pd.api.types.is_dtype_equal(df[col].dtype, dtype):
+                        # Already applied as the file was parsed
+                        continue
                     if dtype.startswith('date'):
                         format = None if dtype == 'date' else dtype[5:]
-                        df[col] = pd.to_datetime(df[col], format=format, utc=True, errors='ignore')
+                        df[col] = _to_datetime(df[col], format)
                     else:
                         df[col] = df[col].astype(dtype, errors='ignore')
 
     def _glob(self, path):
         return glob.glob(os.path.join(path, self.fileglob))
 
-    def _load(self, filename):
-        '''Return a raw, unprocessed dataframe.'''
-        return pd.read_csv(filename, low_memory=False)
+    def _load(self, filename, usecols=None):
+        '''Return a raw, unprocessed dataframe.
 
-    def _load_single(self, filename):
-        '''Use _load to read a dataframe from disk, then assign new column
-           names and coerce the datatypes, as appropriate.'''
-        df = self._load(filename)
+           If usecols is not None, it is the set of column names that are needed,
+           and the loader may skip parsing the others. Its columns may then be
+           labelled by name, or by their position in the file, which is mapped
+           through the columns attribute.
+        '''
+        if self.columns is None:
+            return self._read_csv(filename, usecols, header='infer')
+        return self._read_csv(filename, header='infer')
+
+    def _parse_dtypes(self):
+        '''Return the dtype argument of read_csv that applies the dtypes of the
+           loader as a file is parsed, keyed by position in the file if the
+           columns attribute is set, or by name if not.
+
+           Dates are left to _set_dtypes. So are integers, because read_csv
+           infers int64 for columns that have no missing values, and cannot
+           parse those that do as int64.
+        '''
+        if not self.parse_dtypes or self.dtypes is None:
+            return None
         if self.columns is not None:
-            df.columns = self.columns
-        self._set_dtypes(df)
+            positions = dict((name, i - self.column_offset) for i, name in enumerate(self.columns)
+                             if i >= self.column_offset)
+        result = {}
+        for dtype, cols in self.dtypes.items():
+            if dtype.startswith('date') or dtype.startswith('int'):
+                continue
+            for col in ((cols,) if isinstance(cols, str) else cols):
+                if self.columns is None:
+                    result[col] = dtype
+                elif col in positions:
+                    result[positions[col]] = dtype
+        return result or None
+
+    def _read_csv(self, filename, usecols=None, extra=(), header=None, **kwargs):
+        '''Read a CSV file, applying the dtypes of the loader as it is parsed.
+
+           A file without a header has the columns given by the columns
+           attribute; if usecols is not None, only the named columns, and the
+           positions in extra, are parsed. For a file with a header, usecols
+           and extra select columns by name.
+        '''
+        if usecols is not None:
+            if header is None:
+                # Positions beyond the end of the file are an error, and files
+                # from different periods may have different numbers of columns
+                width = len(pd.read_csv(filename, header=None, nrows=1, **kwargs).columns)
+                wanted = set(extra)
+                wanted.update(i - self.column_offset for i, name in enumerate(self.columns) if name in usecols)
+                kwargs['usecols'] = sorted(i for i in wanted if 0 <= i < width) or [0]
+            else:
+                kwargs['usecols'] = set(usecols).union(extra).__contains__
+        dtype = self._parse_dtypes()
+        if self.parse_engine == 'pyarrow':
+            try:
+                df = _read_arrow_csv(filename, header, dtype, **kwargs)
+            except (ValueError, TypeError, KeyError) as exc:
+                # Such as rows of differing lengths, or values that do not fit the
+                # declared dtypes, which pandas tolerates
+                logger.debug('{}: parsing with pandas: {}'.format(filename, exc))
+            else:
+                if dtype is not None:
+                    _numeric_categories(df, [key for key, value in dtype.items() if value == 'category'])
+                return df
+        if dtype is not None:
+            try:
+                df = pd.read_csv(filename, header=header, low_memory=False, dtype=dtype, **kwargs)
+            except (ValueError, TypeError, OverflowError) as exc:
+                # Leave the values that do not fit the declared dtypes to _set_dtypes
+                logger.debug('{}: parsing without dtypes: {}'.format(filename, exc))
+            else:
+                _numeric_categories(df, [key for key, value in dtype.items() if value == 'category'])
+                return df
+        return pd.read_csv(filename, header=header, low_memory=False, **kwargs)
+
+    def _read_json(self, filename, record_path, last=False, normalize=False):
+        '''Read the records under record_path in each line of a JSON lines
+           file, with _read_ndjson, or with the Arrow JSON reader if that is
+           the parse engine of the loader. See _read_ndjson for the options,
+           with which the Arrow reader is not used.'''
+        if self.parse_engine == 'pyarrow' and not (last or normalize):
+            try:
+                return _read_arrow_ndjson(filename, record_path)
+            except (ValueError, TypeError) as exc:
+                logger.debug('{}: parsing with json: {}'.format(filename, exc))
+        return _read_ndjson(filename, record_path, last=last, normalize=normalize)
+
+    def _using(self, parse_engine=None):
+        '''Return the loader, or a copy of it that parses files with the given
+           engine, one of PARSE_ENGINES.'''
+        if parse_engine is None or parse_engine == self.parse_engine:
+            return self
+        if parse_engine not in PARSE_ENGINES:
+            raise RuntimeError('Unsupported parse engine: {}'.format(parse_engine))
+        if parse_engine == 'pyarrow' and pa is None:
+            raise RuntimeError('The pyarrow parse engine requires the pyarrow package')
+        loader = copy.copy(self)
+        loader.parse_engine = parse_engine
+        return loader
+
+    def _known_columns(self):
+        '''Return the names of the columns the loader declares, in its columns
+           or its dtypes.'''
+        known = set(self.columns or ())
+        for cols in (self.dtypes or {}).values():
+            known.update((cols,) if isinstance(cols, str) else cols)
+        return known
+
+    def _check_columns(self, columns=None, filters=None):
+        '''Raise a RuntimeError if the given columns or filters name a column
+           the loader does not declare. Loaders without a columns attribute take
+           their columns from the files, so only those with one are checked.'''
+        if self.columns is None:
+            return
+        names = set(columns or ())
+        names.update(col for col, _, _ in filters or ())
+        unknown = names.difference(self._known_columns())
+        if unknown:
+            raise RuntimeError('Unknown columns for dataset {}: {}'.format(self.dataset, ', '.join(sorted(unknown))))
+
+    def _select(self, df, columns):
+        '''Return the given columns of a dataframe, and its index column.
+           Columns missing from the file, as they are from files written before
+           the column was added, are filled with NaN.'''
+        keep = list(columns)
+        if self.index is not None and self.index not in keep:
+            keep.append(self.index)
+        missing = [col for col in keep if col not in df]
+        if missing and self.columns is None:
+            unknown = set(missing).difference(self._known_columns())
+            if unknown:
+                logger.warning('{}: columns not found: {}'.format(self.dataset, ', '.join(sorted(unknown))))
+        return df.reindex(columns=keep) if missing else df[keep]
+
+    def _wanted(self, columns=None, filters=None):
+        '''Return the names of the columns that must be read to produce the
+           given columns and apply the given filters, or None for all.'''
+        if columns is None:
+            return None
+        wanted = set(columns)
+        wanted.update(col for col, _, _ in filters or ())
+        if self.index is not None:
+            wanted.add(self.index)
+        return wanted
+
+    def _columnar_path(self, filename):
+        '''Return the path of an up-to-date columnar copy of the file, or None.
+
+           A copy written for a different schema, by another version of the
+           loader, is ignored so that the original is parsed again. If the
+           original has been deleted, such a copy cannot be used at all.
+        '''
+        for fmt in COLUMNAR_FORMATS:
+            candidate = filename + '.' + fmt
+            if not os.path.exists(candidate):
+                continue
+            if os.path.exists(filename) and os.path.getmtime(candidate) < os.path.getmtime(filename):
+                continue
+            if self._columnar_schema(candidate) == self._schema_fingerprint():
+                return candidate
+            if not os.path.exists(filename):
+                raise RuntimeError('{} was written for another version of {}, and the original '
+                                   'has been deleted; download it again'.format(candidate, type(self).__name__))
+            logger.debug('_columnar_path: ignoring {}, written for another schema'.format(candidate))
+        return None
+
+    def _columnar_schema(self, filename):
+        '''Return the schema fingerprint recorded in a columnar copy, or None.'''
+        if pa is None:
+            return None
+        try:
+            if filename.endswith('.feather'):
+                metadata = pa.ipc.open_file(filename).schema.metadata
+            else:
+                metadata = pa.parquet.read_schema(filename).metadata
+        except (OSError, pa.ArrowInvalid):
+            return None
+        value = (metadata or {}).get(COLUMNAR_SCHEMA_KEY)
+        return value.decode('utf-8') if value is not None else None
+
+    def _schema_fingerprint(self):
+        return hashlib.sha1(repr(self._schema()).encode('utf-8')).hexdigest()
+
+    def _read_columnar(self, filename, columns=None):
+        if filename.endswith('.feather'):
+            read, schema = pd.read_feather, lambda: pa.ipc.open_file(filename).schema
+        else:
+            read, schema = pd.read_parquet, lambda: pa.parquet.read_schema(filename)
+        if columns is None:
+            return read(filename)
+        # Columns that are not present are added later by reindexing, as pd.concat would
+        present = set(schema().names)
+        return read(filename, columns=[col for col in columns if col in present])
+
+    def transcode(self, filename, format='parquet', keep=True):
+        '''Write a typed, columnar copy of a file next to it, so that later
+           loads can read the copy instead of parsing the original.
+
+           :param format: 'parquet' or 'feather'; both require pyarrow.
+           :param keep: Set to False to delete the original once the copy is written.
+           :returns: the path of the copy.
+        '''
+        if format not in COLUMNAR_FORMATS:
+            raise RuntimeError('Unsupported columnar format: {}'.format(format))
+        if pa is None:
+            raise RuntimeError('Transcoding to {} requires the pyarrow package'.format(format))
+        df = self._load_single(filename)
+        if self.index is not None:
+            df = df.reset_index()
+        target = filename + '.' + format
+        temp = target + '.tmp'
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # Record the schema, so that the copy is not read by a loader that would type it differently
+        metadata = dict(table.schema.metadata or {})
+        metadata[COLUMNAR_SCHEMA_KEY] = self._schema_fingerprint().encode('utf-8')
+        table = table.replace_schema_metadata(metadata)
+        if format == 'feather':
+            pa.feather.write_feather(table, temp)
+        else:
+            pa.parquet.write_table(table, temp)
+        os.replace(temp, target)
+        if not keep:
+            os.remove(filename)
+        return target
+
+    def _schema(self):
+        return (type(self).__name__, self.schema_version, self.columns, self.dtypes, self.index)
+
+    def _load_cached(self, cache, filename, columns=None, filters=None, precision=None):
+        '''Read a dataframe from the cache if the file is unchanged, or with
+           _load_single if not, storing the result in the cache.'''
+        source = filename if os.path.exists(filename) else self._columnar_path(filename)
+        key = cache.key(self, source, columns, filters, *((sorted(precision),) if precision else ()))
+        df = cache.get(key)
+        if df is None:
+            df = self._load_single(filename, columns, filters, precision)
+            cache.put(key, df)
+        return df
+
+    def _load_mapped(self, cache, filename, columns=None, filters=None, precision=None):
+        '''Make sure that the file is in an ArrowCache, and return its key.'''
+        source = filename if os.path.exists(filename) else self._columnar_path(filename)
+        key = cache.key(self, source, columns, filters, *((sorted(precision),) if precision else ()))
+        if not os.path.exists(cache._entry(key)):
+            cache.put(key, self._load_single(filename, columns, filters, precision))
+        return key
+
+    def _resolve_cache(self, cache=None):
+        if cache is None:
+            cache = self.cache
+        if cache is True:
+            return FrameCache()
+        if cache == 'arrow':
+            return ArrowCache()
+        return cache or None
+
+    def _reader(self, cache=None, columns=None, filters=None, output='pandas', precision=None):
+        '''Return the function used to read each file, which must be picklable.'''
+        self._check_columns(columns, filters)
+        precision = _precision(precision) or None
+        if cache is None:
+            if columns is None and not filters and not precision:
+                reader = self._load_single
+            else:
+                reader = functools.partial(self._load_single, columns=columns, filters=filters,
+                                           precision=precision)
+        elif isinstance(cache, ArrowCache):
+            return functools.partial(self._load_mapped, cache, columns=columns, filters=filters,
+                                     precision=precision)
+        else:
+            reader = functools.partial(self._load_cached, cache, columns=columns, filters=filters,
+                                       precision=precision)
+        if output != 'pandas':
+            # Convert each dataframe where it is read, so that only tables
+            # are passed back and concatenated
+            reader = functools.partial(self._load_table, reader)
+        return reader
+
+    def _check_output(self, output):
+        if output not in OUTPUT_FORMATS:
+            raise RuntimeError('Unsupported output format: {}'.format(output))
+        if output != 'pandas' and pa is None:
+            raise RuntimeError('The {} output format requires the pyarrow package'.format(output))
+        if output == 'polars' and pl is None:
+            raise RuntimeError('The polars output format requires the polars package')
+
+    def _to_table(self, df):
+        '''Convert a dataframe to a pyarrow Table, with any index as a column.
+           Categorical columns, and any others that the dtypes declare to be
+           categories, are dictionary encoded.'''
+        table = pa.Table.from_pandas(df, preserve_index=not isinstance(df.index, pd.RangeIndex))
+        cols = self.dtypes.get('category', ()) if self.dtypes is not None else ()
+        for col in ((cols,) if isinstance(cols, str) else cols):
+            i = table.schema.get_field_index(col)
+            if i >= 0 and not pa.types.is_dictionary(table.schema.field(i).type):
+                try:
+                    table = table.set_column(i, col, table.column(i).dictionary_encode())
+                except pa.ArrowNotImplementedError:
+                    pass
+        return table
+
+    def _load_table(self, reader, filename):
+        return self._to_table(reader(filename))
+
+    def _concat_tables(self, tables, output='pandas'):
+        '''Concatenate pyarrow Tables into a result of the given output format.'''
+        if output == 'pandas':
+            if len(tables) < 2:
+                return self._concat([table.to_pandas() for table in tables])
+            logger.info('concatenating {} tables'.format(len(tables)))
+            try:
+                table = pa.concat_tables(tables)
+            except pa.ArrowInvalid:
+                # The files were read with differing types, which pandas can reconcile
+                return self._concat([table.to_pandas() for table in tables])
+            return table.to_pandas(split_blocks=True)
+        if not tables:
+            table = self._to_table(self._concat([]))
+        elif len(tables) == 1:
+            table = tables[0]
+        else:
+            logger.info('concatenating {} tables'.format(len(tables)))
+            try:
+                table = pa.concat_tables(tables)
+            except pa.ArrowInvalid:
+                table = self._to_table(self._concat([table.to_pandas() for table in tables]))
+        if output == 'polars':
+            return pl.from_arrow(table)
+        return table
+
+    def _concat_mapped(self, cache, keys, output='pandas'):
+        '''Assemble a result from the memory-mapped entries of an ArrowCache.'''
+        tables = []
+        for key in keys:
+            table = cache.open(key)
+            if table is None:
+                raise RuntimeError('cache: entry {} was removed before it could be read'.format(key))
+            tables.append(table)
+        return self._concat_tables(tables, output)
+
+    def _assemble(self, results, cache=None, output='pandas', sort=False, columns=None):
+        '''Combine the results of the reader returned by _reader into one result
+           of the given output format, optionally sorted by the sort_by columns.
+           A sorted result is reduced to the columns given, if any, which the
+           reader was given with the sort_by columns added by _check_sort.'''
+        if isinstance(cache, ArrowCache):
+            df = self._concat_mapped(cache, results, output)
+        elif sort:
+            df = self._concat_sorted(results)
+            if columns is not None:
+                df = df[list(columns)]
+        elif output == 'pandas':
+            df = self._concat(results)
+        else:
+            df = self._concat_tables(results, output)
+        if cache is not None:
+            cache.evict()
+        return df
+
+    def _downcast(self, df, precision):
+        '''Narrow the numeric columns of a dataframe in place, according to
+           the given set of PRECISIONS. A column is only narrowed if every
+           value survives: floats that would overflow float32, and floats
+           that are not whole numbers, are left as they are.'''
+        ints = self.dtypes.get('int64', ()) if self.dtypes is not None else ()
+        ints = set((ints,) if isinstance(ints, str) else ints)
+        for col in df.columns:
+            series = df[col]
+            if series.dtype == 'int64':
+                if 'int' in precision and len(series):
+                    df[col] = series.astype(_smallest_int(series))
+            elif series.dtype == 'float64':
+                values = series.dropna().values
+                if ('nullable' in precision and col in ints and np.isfinite(values).all() and
+                        (values == np.floor(values)).all()):
+                    dtype = _smallest_int(values, nullable=True) if len(values) else 'Int64'
+                    if dtype is not None:
+                        df[col] = series.astype(dtype if 'int' in precision else 'Int64')
+                        continue
+                if 'float32' in precision:
+                    narrow = series.astype('float32')
+                    if np.isinf(narrow.values).sum() == np.isinf(series.values).sum():
+                        df[col] = narrow
+
+    def _load_single(self, filename, columns=None, filters=None, precision=None):
+        '''Use _load to read a dataframe from disk, then assign new column
+           names and coerce the datatypes, as appropriate. If the file has
+           been transcoded to a columnar format, the copy is read instead.
+
+           Only the given columns, and the rows that pass the given filters,
+           are kept. Columns needed for neither are not parsed if the loader
+           supports it, and the rows that are filtered out are discarded
+           before the remaining columns are coerced.
+        '''
+        wanted = self._wanted(columns, filters)
+        columnar = self._columnar_path(filename)
+        if columnar is not None:
+            df = self._read_columnar(columnar, wanted)
+            typed = True
+        else:
+            df = self._load(filename) if wanted is None else self._load(filename, usecols=wanted)
+            if self.columns is not None:
+                if len(df.columns) == len(self.columns):
+                    df.columns = self.columns
+                else:
+                    # A subset of the columns was read, labelled by position
+                    df.columns = [self.columns[col + self.column_offset] if isinstance(col, numbers.Integral)
+                                  else col for col in df.columns]
+            typed = False
+        if filters:
+            filtered = set(col for col, _, _ in filters)
+            if not typed:
+                self._set_dtypes(df, only=filtered)
+            df = df.loc[_filter_mask(df, filters)]
+        if columns is not None:
+            df = self._select(df, columns)
+        elif filters:
+            df = df.copy()
+        if not typed:
+            self._set_dtypes(df, only=None if not filters else set(df.columns).difference(filtered))
         if self.index is not None:
             df = df.set_index(self.index)
+        if precision:
+            self._downcast(df, precision)
         return df
 
     def _finalize(self, df):
         return df
 
-    def load(self, filenames, limit=None, max_workers=None):
-        '''Load a composite dataframe by concatenating individual files.'''
+    def _check_sort(self, columns=None, output='pandas', cache=None):
+        '''Raise a RuntimeError if the result of load cannot be sorted, and
+           return the columns to load, with the sort_by columns added.'''
+        if self.sort_by is None:
+            raise RuntimeError('Dataset {} cannot be sorted'.format(self.dataset))
+        if output != 'pandas' or isinstance(cache, ArrowCache):
+            raise RuntimeError('sort is only supported for pandas output without an ArrowCache')
+        if columns is None:
+            return None
+        return list(columns) + [key for key in self.sort_by if key not in columns]
+
+    def _sort(self, df):
+        '''Return the dataframe sorted by the sort_by columns, keeping the
+           order of rows with equal keys.'''
+        keys = list(self.sort_by)
+        arrays = _sort_keys(df, keys)
+        packed = _pack_keys(arrays) if arrays is not None and len(df) else None
+        if packed is not None:
+            if (packed[1:] >= packed[:-1]).all():
+                return df
+        elif pd.MultiIndex.from_frame(df[keys]).is_monotonic_increasing:
+            return df
+        return df.sort_values(keys, kind='mergesort', ignore_index=self.index is None)
+
+    def _concat_sorted(self, frames):
+        '''Concatenate dataframes into one sorted by the sort_by columns,
+           sorting each that is not in order, and then merging the rows of
+           those that overlap rather than sorting all the rows again.'''
+        frames = [frame for frame in frames if len(frame)]
+        missing = [key for key in self.sort_by if frames and key not in frames[0]]
+        if missing:
+            raise RuntimeError('Cannot sort without the columns {}'.format(', '.join(missing)))
+        # Files are usually in order already, which is checked cheaply
+        frames = [self._sort(frame) for frame in frames]
+        merge = _merge_order(frames, list(self.sort_by)) if len(frames) > 1 else None
+        if merge is None:
+            result = self._concat(frames)
+            return self._sort(result) if len(frames) > 1 else result
+        order, positions = merge
+        result = self._concat([frames[i] for i in order])
+        if positions is not None:
+            result = result.take(positions)
+            if self.index is None:
+                result = result.reset_index(drop=True)
+        return result
+
+    def _file_label(self, filename):
+        '''Return the (date, kind) of a file given by the filename_pattern,
+           with None for either that its name does not give.'''
+        match = re.search(self.filename_pattern, os.path.basename(filename))
+        if match is None:
+            return None, None
+        groups = match.groupdict()
+        return groups.get('date'), groups.get('kind')
+
+    def _file_index(self, filenames):
+        '''Return a list of (date, kind, filename) tuples, sorted by date, with
+           the files whose names give no date first.'''
+        index = []
+        for fname in filenames:
+            date, kind = self._file_label(fname)
+            index.append((date or '', kind or '', fname))
+        index.sort()
+        return index
+
+    def _filenames(self, filenames, limit=None, start=None, end=None, kind=None):
+        '''Resolve a directory, glob pattern, filename or list of filenames,
+           ordered by the dates in their names, and select those from start
+           to end, of the given kind or kinds, and then the last limit.'''
         if isinstance(filenames, str):
             if os.path.isdir(filenames):
-                filenames = self._glob(filenames)
+                path, filenames = filenames, self._glob(filenames)
+                # Include files that are only present in columnar form
+                known = set(filenames)
+                for fmt in COLUMNAR_FORMATS:
+                    for fname in glob.glob(os.path.join(path, self.fileglob + '.' + fmt)):
+                        fname = fname[:-len(fmt) - 1]
+                        if fname not in known:
+                            known.add(fname)
+                            filenames.append(fname)
             elif '*' in filenames:
                 filenames = glob.glob(filenames)
             else:
                 filenames = [filenames]
+        index = self._file_index(filenames)
+        start, end = _yyyymmdd(start), _yyyymmdd(end)
+        if start is not None:
+            index = [entry for entry in index if entry[0] and entry[0] >= start]
+        if end is not None:
+            index = [entry for entry in index if entry[0] and entry[0] <= end]
+        if kind is not None:
+            kinds = (kind,) if isinstance(kind, str) else set(kind)
+            index = [entry for entry in index if entry[1] in kinds]
+        filenames = [fname for _, _, fname in index]
         nframes = len(filenames)
         if limit and nframes > limit:
             logger.info('limiting to {}/{} files'.format(limit, nframes))
             filenames = filenames[-limit:]
-            nframes = limit
+        return filenames
+
+    def _concat(self, frames):
+        '''Concatenate the dataframes read from individual files.'''
+        nframes = len(frames)
         if nframes == 0:
             result = pd.DataFrame(columns=self.columns)
             self._set_dtypes(result)
         elif nframes == 1:
-            result = self._load_single(filenames[0])
+            result = frames[0]
         else:
-            result = tqdm_execute_tasks(self._load_single, filenames,
-                                        'reading {} data'.format(self.dataset), max_workers)
             logger.info('concatenating {} dataframes'.format(nframes))
-            result = pd.concat(result, ignore_index=self.index is None)
-            # Set the categorical columns again, because concatenation often
-            # results in a reversion to object dtype
-            cols = self.dtypes.get('category', ())
-            for col in ((cols,) if isinstance(cols, str) else cols):
-                if col in result:
+            cols = self.dtypes.get('category', ()) if self.dtypes is not None else ()
+            cols = (cols,) if isinstance(cols, str) else cols
+            frames = _unify_categories(frames, cols)
+            result = pd.concat(frames, ignore_index=self.index is None)
+            # Set any categorical columns whose categories could not be
+            # unified again, because they have reverted to object dtype
+            for col in cols:
+                if col in result and not isinstance(result[col].dtype, pd.CategoricalDtype):
                     result[col] = result[col].astype('category', errors='ignore')
-        return self._finalize(result)
+        return result
+
+    def _result_bytes(self, result, cache=None):
+        '''Return the memory taken by a result of the reader returned by _reader.'''
+        if isinstance(cache, ArrowCache):
+            return os.path.getsize(cache._entry(result))
+        if isinstance(result, pd.DataFrame):
+            return int(result.memory_usage(deep=True).sum())
+        return result.nbytes
+
+    def _source_bytes(self, filename):
+        return os.path.getsize(filename if os.path.exists(filename) else self._columnar_path(filename))
+
+    def _estimate(self, results, sample, filenames, cache=None):
+        '''Estimate the memory taken by the results for all the files from
+           those for a sample of them, in proportion to their sizes on disk.'''
+        read = sum(self._result_bytes(result, cache) for result in results)
+        sampled = sum(self._source_bytes(fname) for fname in sample)
+        total = sum(self._source_bytes(fname) for fname in filenames)
+        return int(read * total / sampled) if sampled else read * len(filenames) // max(len(sample), 1)
+
+    def load(self, filenames, limit=None, max_workers=None, cache=None, columns=None, filters=None,
+             parse_engine=None, output='pandas', start=None, end=None, kind=None, precision=None,
+             memory_budget=None, over_budget='warn', sort=False):
+        '''Load a composite dataframe by concatenating individual files.
+
+           The files are ordered by the dates in their names, as given by the
+           filename_pattern attribute, and selected without being opened.
+
+           :param limit: Only load the last this many files, the most recent.
+           :param start: Only load the files dated on or after this date (YYYYMMDD).
+           :param end: Only load the files dated on or before this date (YYYYMMDD).
+           :param kind: Only load the files of this kind, or of any of these kinds,
+                        where the names of the files of a dataset give one.
+           :param precision: Narrow the numeric columns of each file as it is read:
+                             'float32' for single-precision floats, 'int' for the
+                             smallest integer types that hold the values, 'nullable'
+                             for nullable integers where integer columns have missing
+                             values, a list of these, or 'compact' for all three.
+                             Columns whose values would not survive are left as they are.
+           :param memory_budget: The number of bytes the result may take. The first
+                                 files are read, one per worker, and the size of the
+                                 result is estimated from theirs.
+           :param over_budget: What to do if the estimate exceeds memory_budget: 'warn'
+                               to log a warning and load anyway, 'raise' to raise a
+                               RuntimeError, or 'stream' to return a generator like
+                               that of iter_load instead, which yields pandas dataframes,
+                               starting with those of the files already read.
+                               It cannot be combined with sort, which raises a RuntimeError.
+           :param sort: Return the rows in the order of the sort_by columns of the
+                        loader, such as (trade_date_time, trade_sequence_number)
+                        for TICK, whatever the order of the files. Each file not
+                        already in order is sorted, and the files are merged. Only for
+                        pandas output, without an ArrowCache.
+
+           :param columns: The names of the columns to load, or None for all. A
+                           RuntimeError is raised for names the loader does not declare.
+           :param filters: A list of (column, operator, value) tuples, such as
+                           ('Product Code', 'in', {'ES', 'NQ'}); only the rows that
+                           pass every filter are loaded. The operators are ==, !=,
+                           <, <=, >, >=, in and not in. Each value is compared with
+                           the column after its dtype has been set, so dates may be
+                           given as strings.
+           :param cache: A FrameCache in which to keep the dataframe read from each
+                         file, or True to use a cache with the default location and
+                         size, or 'arrow' to use an ArrowCache likewise. Defaults to
+                         the cache attribute of the loader.
+           :param parse_engine: 'c' to parse CSV files with pandas, or 'pyarrow' to use
+                                the multithreaded Arrow CSV reader, which requires
+                                pyarrow. Files the Arrow reader cannot parse are read
+                                with pandas. Defaults to the parse_engine attribute.
+           :param output: 'pandas' for a pandas DataFrame, 'arrow' for a pyarrow Table,
+                          or 'polars' for a polars DataFrame. Each file is converted as
+                          it is read, and the results are concatenated as Arrow tables,
+                          with categorical columns dictionary encoded. An index set by
+                          the loader becomes an ordinary column.
+        '''
+        self._check_output(output)
+        if over_budget not in ('warn', 'raise', 'stream'):
+            raise RuntimeError('Unsupported over_budget action: {}'.format(over_budget))
+        if sort and over_budget == 'stream' and memory_budget is not None:
+            # The files are only merged in order once they have all been read
+            raise RuntimeError("sort cannot be combined with over_budget='stream'")
+        cache = self._resolve_cache(cache)
+        requested = columns
+        if sort:
+            columns = self._check_sort(columns, output, cache)
+        reader = self._using(parse_engine)._reader(cache, columns, filters, output, precision)
+        filenames = self._filenames(filenames, limit, start, end, kind)
+        desc = 'reading {} data'.format(self.dataset)
+        result = []
+        if memory_budget is not None and len(filenames) > 1:
+            sample = filenames[:max_workers or MAX_WORKERS]
+            if over_budget == 'stream':
+                # Read the sample as iter_load would, so that it can be streamed
+                # rather than read again, and converted to tables if it is not
+                streamer = self._using(parse_engine)._reader(cache, columns, filters, precision=precision)
+                convert = output != 'pandas' and not isinstance(cache, ArrowCache)
+            else:
+                streamer, convert = reader, False
+            result = tqdm_execute_tasks(streamer, sample, desc, max_workers)
+            estimate = self._estimate(result, sample, filenames, cache)
+            if estimate > memory_budget:
+                message = '{} data estimated at {:,} bytes, over the budget of {:,}'.format(
+                    self.dataset, estimate, memory_budget)
+                if over_budget == 'raise':
+                    raise RuntimeError(message)
+                if over_budget == 'stream':
+                    logger.warning('load: {}, streaming instead'.format(message))
+                    rest = tqdm_iterate_tasks(streamer, filenames[len(sample):], desc, max_workers)
+                    return self._iter_results(_chain_results(result, rest), cache)
+                logger.warning('load: {}'.format(message))
+            if convert:
+                result = [self._to_table(df) for df in result]
+            filenames = filenames[len(sample):]
+        if len(filenames) == 1:
+            result.append(reader(filenames[0]))
+        elif filenames:
+            result.extend(tqdm_execute_tasks(reader, filenames, desc, max_workers))
+        result = self._assemble(result, cache, output, sort, requested)
+        return self._finalize(result) if output == 'pandas' else result
+
+    def iter_load(self, filenames, limit=None, max_workers=None, chunksize=None, read_ahead=None, cache=None,
+                  columns=None, filters=None, parse_engine=None, start=None, end=None, kind=None,
+                  precision=None):
+        '''Generate the dataframes read from individual files, in order, rather
+           than concatenating them, so that a dataset larger than memory can be
+           processed piece by piece. Each dataframe has had its columns named and
+           its dtypes set, but categories are not shared between them.
+
+           :param chunksize: Instead of one dataframe per file, generate dataframes
+                             of this many rows (the last may have fewer), which may
+                             span files.
+           :param read_ahead: The number of files that may be read before they are
+                              needed, twice the number of workers by default.
+           :param cache, columns, filters, parse_engine, start, end, kind, precision: As for load.
+        '''
+        cache = self._resolve_cache(cache)
+        filenames = self._filenames(filenames, limit, start, end, kind)
+        reader = self._using(parse_engine)._reader(cache, columns, filters, precision=precision)
+        results = tqdm_iterate_tasks(reader, filenames, 'reading {} data'.format(self.dataset), max_workers, read_ahead)
+        yield from self._iter_results(results, cache, chunksize)
+
+    def _iter_results(self, results, cache=None, chunksize=None):
+        '''Generate the dataframes of iter_load from the results of its reader,
+           a generator that is closed once they have been generated.'''
+        if isinstance(cache, ArrowCache):
+            results = (self._concat_mapped(cache, [key]) for key in results)
+        try:
+            if chunksize is None:
+                yield from results
+                return
+            pending, npending = [], 0
+            for df in results:
+                while len(df):
+                    part = df.iloc[:chunksize - npending]
+                    df = df.iloc[len(part):]
+                    pending.append(part)
+                    npending += len(part)
+                    if npending == chunksize:
+                        yield self._concat(pending)
+                        pending, npending = [], 0
+            if pending:
+                yield self._concat(pending)
+        finally:
+            results.close()
+            if cache is not None:
+                cache.evict()
@@ -1,13 +1,21 @@
 from . import Loader
 
+import numpy as np
 import pandas as pd
-import datetime
-import pytz
+
+from ..utils import logger
+
+TIMEZONES = {'ET': 'US/Eastern', 'CT': 'US/Central'}
 
 
 class BlockLoader(Loader):
     dataset = 'BLOCK'
     fileglob = '*.csv.gz'
+    # The local date of the trade, rather than the date of Trade Datetime in UTC
+    partition_date = 'Trade Date'
+    partition_product = 'Product Code'
+    # Trade Datetime and Reported Datetime are in UTC, and Trade Date is kept
+    schema_version = 3
 
     # Column "Product Type 2" has an extra space after the name.
     # columns = ['Trade Datetime', 'Reported Datetime',
@@ -28,34 +36,44 @@ class BlockLoader(Loader):
                         'Strike Price 2', 'Trade Price 2', 'Trade Quantity 2',
                         'Strike Price 3',
                         'Strike Price 4'),
-              'date': ()}
+              'date': (),
+              'date:%Y%m%d': ('Trade Date',)}
     
-    def _load(self, file):
-        df = pd.read_csv(file, low_memory = False)
-        
-        df['Trade Datetime'] = df['Trade Date'].astype('str') + ' ' + df['Trade Time'].astype('str')
-        df['Reported Datetime'] = df['Trade Date'].astype('str') + ' ' + df['Reported Time'].astype('str')
-        
-        timezone = df['Trade Datetime'].str[-2:]
-        if timezone.unique()[0] == "ET":
-            sub_string = " ET"
-            timezone = pytz.timezone("US/Eastern") 
-        elif timezone.unique()[0] == "CT":
-            sub_string = " CT"
-            timezone = pytz.timezone("US/Central") 
-        else:
-            pass
-            
-        df['Trade Datetime'] = df['Trade Datetime'].str.replace(sub_string, "")
-        df['Reported Datetime'] = df['Reported Datetime'].str.replace(sub_string, "")
-        
-        df['Trade Datetime'] = df['Trade Datetime'].apply(datetime.datetime.strptime, args=('%Y%m%d %H:%M:%S',))
-        df['Trade Datetime'] = df['Trade Datetime'].apply(timezone.localize)
-        df['Reported Datetime'] = df['Reported Datetime'].apply(datetime.datetime.strptime, args=('%Y%m%d %H:%M',))
-        df['Reported Datetime'] = df['Reported Datetime'].apply(timezone.localize)
-
-        df = df.drop(['Trade Date', 'Trade Time', 'Reported Time'], axis=1)
+    def _load(self, file, usecols=None):
+        # The datetime columns are derived from the dates and times
+        df = self._read_csv(file, usecols, ('Trade Date', 'Trade Time', 'Reported Time'), header='infer')
+
+        # Each time ends with the timezone of its row, which may differ between rows
+        dates = df['Trade Date'].astype('str') + ' '
+        zones = df['Trade Time'].astype('str').str[-2:]
+        df['Trade Datetime'] = _localize(dates + df['Trade Time'].astype('str').str[:-3], zones,
+                                         '%Y%m%d %H:%M:%S')
+        df['Reported Datetime'] = _localize(dates + df['Reported Time'].astype('str').str[:-3], zones,
+                                            '%Y%m%d %H:%M')
+
+        df = df.drop(['Trade Time', 'Reported Time'], axis=1)
         return(df)
-        
+
+
+def _localize(text, zones, format):
+    '''Parse local times with one to_datetime and tz_localize them per
+       timezone, returning them in UTC in the unit to_datetime gives, as for
+       the other date columns. Rows without a known timezone are NaT.'''
+    groups = zones.groupby(zones, sort=False).groups
+    for zone, rows in groups.items():
+        if zone not in TIMEZONES:
+            logger.warning('BLOCK: unknown timezone {!r} in {} rows'.format(zone, len(rows)))
+    local = pd.to_datetime(text[zones.isin(TIMEZONES)], format=format)
+    result = pd.Series(pd.NaT, index=text.index, dtype=local.dt.tz_localize('UTC').dtype)
+    for zone, timezone in TIMEZONES.items():
+        if zone not in groups:
+            continue
+        rows = groups[zone]
+        # Ambiguous and nonexistent times are taken as standard time, as pytz.localize does by default
+        times = pd.DatetimeIndex(local[rows]).tz_localize(
+            timezone, ambiguous=np.zeros(len(rows), dtype=bool), nonexistent=pd.Timedelta(hours=1))
+        result[rows] = times.tz_convert('UTC')
+    return result
+
 
 blockLoader = BlockLoader()
@@ -1,13 +1,11 @@
 from . import Loader
 
-import pandas as pd
-import gzip
-import json
-
 class CryptocurrencyLoader(Loader):
     dataset = 'CRYPTOCURRENCY'
     fileglob = '*_btcIndexJson.gz'
     index = 'mdEntryDateTime'
+    # Every entry of each update is read, not only the first
+    schema_version = 2
 
     dtypes = {'category': ('mdEntryCode', 'mdEntryType', 'mdUpdateAction',
                            'symbol', 'openCloseSettlFlag'),
@@ -15,14 +13,8 @@ class CryptocurrencyLoader(Loader):
               'float': ('netChgPrevDay', 'netPctChg', 'mdEntryPx'),
               'date:%Y%m%d_%H:%M:%S.%f': 'mdEntryDateTime'}
 
-    def _load(self, filename):
-        result = []
-        with gzip.open(filename, 'rt', encoding='utf-8') as f:
-            for line in f:
-                line = json.loads(line)
-                if 'mdEntries' in line:
-                    result.append(line['mdEntries'][0])
-        result = pd.DataFrame(result)
+    def _load(self, filename, usecols=None):
+        result = self._read_json(filename, 'mdEntries')
         result['mdEntryDateTime'] = result['mdEntryDate'] + '_' + result['mdEntryTime']
         return result.drop(['mdEntryDate', 'mdEntryType'], axis=1)
 
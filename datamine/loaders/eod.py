@@ -1,11 +1,12 @@
 from . import Loader
 
-import pandas as pd
 import numpy as np
 
 class EODLoader(Loader):
     dataset = 'EOD'
     fileglob = '*.gz'
+    partition_date = 'Trade Date'
+    partition_product = 'Product Code'
 
     columns = ['Trade Date','Exchange Code', 'Asset Class', 'Product Code', 'Clearing Code',
        'Product Description', 'Product Type', 'Underlying Product Code',
@@ -79,9 +80,10 @@ class EODLoader(Loader):
               'date:%Y%m%d': ('Trade Date','Last Trade Date'),
               }
 
-    def _load(self, file):
-        df = pd.read_csv(file, skiprows=1, header=None, low_memory=False)
-        if len(df.columns) == 70:
+    def _load(self, file, usecols=None):
+        df = self._read_csv(file, usecols, skiprows=1)
+        # Older files have no TAM column
+        if 70 not in df.columns and (usecols is None or "TAM (Trade At Marker)" in usecols):
             df.insert(len(df.columns), "TAM (Trade At Marker)", float(np.nan))
         return df
 
@@ -1,6 +1,5 @@
 from . import Loader
 
-import pandas as pd
 import numpy as np
 
 class ErisLoader(Loader):
@@ -38,8 +37,8 @@ class ErisLoader(Loader):
                                 'FedFundsDate', 'LastTradeDate', 'FirstFixingDate',
                                 'UnpaidFixedAccrualStartDate', 'UnpaidFloatingAccrualStartDate')}
 
-    def _load(self, file):
-        df = pd.read_csv(file, low_memory=False)
+    def _load(self, file, usecols=None):
+        df = self._read_csv(file, header='infer')
         if len(df.columns) == 58:
             col_adjustment = {'UnpaidFixedAccrualStartDate' : np.datetime64(), 'UnpaidFixedAccrual' : float(), 'UnpaidFloatingAccrualStartDate' : np.datetime64(), 'UnpaidFloatingAccrual' : float(), 'NetUnpaidFixedFloatingAccrual' : float(), 'NPV(A)lessNetUnpaidFixedFloatingAccrual' : float(), 'AccruedCoupons(B)plusNetUnpaidFixedFloatingAccrual' : float()}
             for k, v in col_adjustment.items():
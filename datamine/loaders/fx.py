@@ -1,10 +1,10 @@
 from . import Loader
 
-import pandas as pd
 
 class FXLoader(Loader):
     dataset = 'FX'
     fileglob = '*.gz'
+    partition_date = 'Timestamp'
 
     columns = ['Timestamp', 'Pair', 'Ask', 'Bid']
 
@@ -14,8 +14,8 @@ class FXLoader(Loader):
               'date': ('Timestamp',),
               }
 
-    def _load(self, file):
-        df = pd.read_csv(file, skiprows=1, header=None, low_memory=False)
+    def _load(self, file, usecols=None):
+        df = self._read_csv(file, usecols, skiprows=1)
         
         return df
 
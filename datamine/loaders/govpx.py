@@ -1,6 +1,5 @@
 from datamine.loaders import Loader
 
-import pandas as pd
 
 class GOVPXLoader(Loader):
         
@@ -88,8 +87,8 @@ class GOVPXLoader(Loader):
                     fileglob = "*_Agencies_*.csv"
             print("Complete reload")
             
-    def _load(self, file):
-        df = pd.read_csv(file, skiprows=1, header=None, low_memory=False)
+    def _load(self, file, usecols=None):
+        df = self._read_csv(file, usecols, skiprows=1)
         return df
 
 govpxLoader = GOVPXLoader()
@@ -1,12 +1,91 @@
 from . import Loader
 
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-start = datetime(1970, 1, 1)  # Unix epoch start time
+
+LEVELS = 10
+LEVEL_FIELDS = ('spread', 'midprice', 'weightedprice', 'ask_price', 'bid_price',
+                'ask_quantity', 'bid_quantity', 'ask_orders', 'bid_orders')
+LOTS = 25
+LOT_FIELDS = ('size', 'buy_ctt', 'sell_ctt', 'buy_depth', 'sell_depth')
+
+
+def _level_columns():
+    return [['avg_level_{}_{}'.format(level, field) for field in LEVEL_FIELDS] for level in range(1, LEVELS + 1)]
+
+
+def _lot_columns():
+    return [['lot_{}_{}'.format(lot, field) for field in LOT_FIELDS] for lot in range(1, LOTS + 1)]
+
+
+class LiquidityBlocks(object):
+    """
+    The average book levels and lot sizes of a LIQTOOL dataframe, each held
+    as one contiguous array of rows x levels (or lots) x fields, rather than
+    as hundreds of separate columns.
+
+    levels has shape (rows, 10, 9), with the fields in LEVEL_FIELDS order,
+    and lots has shape (rows, 25, 5), with the fields in LOT_FIELDS order.
+    Missing values are NaN. frame holds the other columns, and the index.
+    """
+
+    def __init__(self, frame, levels, lots):
+        self.frame = frame
+        self.levels = levels
+        self.lots = lots
+
+    @classmethod
+    def from_frame(cls, df, dtype='float64'):
+        '''Move the level and lot columns of a dataframe into arrays of dtype.'''
+        level_columns, lot_columns = _level_columns(), _lot_columns()
+        blocks = []
+        for names, shape in ((level_columns, (LEVELS, len(LEVEL_FIELDS))), (lot_columns, (LOTS, len(LOT_FIELDS)))):
+            flat = [col for group in names for col in group]
+            # Columns that were not loaded are NaN
+            values = df.reindex(columns=flat).to_numpy(dtype=dtype, na_value=np.nan)
+            blocks.append(np.ascontiguousarray(values.reshape((len(df),) + shape)))
+        dropped = [col for group in level_columns + lot_columns for col in group]
+        return cls(df.drop(columns=dropped, errors='ignore'), *blocks)
+
+    @classmethod
+    def concat(cls, blocks):
+        '''Combine LiquidityBlocks, such as those built from each dataframe
+           generated by iter_dataset.'''
+        blocks = list(blocks)
+        if not blocks:
+            raise RuntimeError('No LiquidityBlocks to combine')
+        return cls(pd.concat([block.frame for block in blocks]),
+                   np.concatenate([block.levels for block in blocks]),
+                   np.concatenate([block.lots for block in blocks]))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def level(self, field):
+        '''Return a field of every level, such as 'ask_price', as an array of
+           rows x levels.'''
+        return self.levels[:, :, LEVEL_FIELDS.index(field)]
+
+    def lot(self, field):
+        '''Return a field of every lot size, such as 'buy_depth', as an array
+           of rows x lots.'''
+        return self.lots[:, :, LOT_FIELDS.index(field)]
+
+    def to_frame(self):
+        '''Return the other columns followed by the level and lot columns,
+           all of the dtype of the arrays, as a dataframe.'''
+        columns = {}
+        for names, values in ((_level_columns(), self.levels), (_lot_columns(), self.lots)):
+            for i, group in enumerate(names):
+                for j, col in enumerate(group):
+                    columns[col] = values[:, i, j]
+        return pd.concat([self.frame, pd.DataFrame(columns, index=self.frame.index)], axis=1)
+
 
 class LiqLoader(Loader):
     dataset = 'LIQTOOL'
     fileglob = 'LIQTOOL_*.csv.gz'
+    partition_date = 'tradedate'
     index = 'tradedate'
     
     dtypes = {'category': ('symbol', 'time_zone'),
@@ -53,10 +132,18 @@ class LiqLoader(Loader):
               'date': ('unixtime',),
               'date:%Y%m%d': ('tradedate',)}
     
-    def _load(self, file):
-        df = pd.read_csv(file, low_memory = False)
-        df['unixtime'] = df['unix_in_sec'].apply(lambda x: start + timedelta(seconds=x))
-        df = df.drop(['unix_in_sec'], axis=1)
+    def _load(self, file, usecols=None):
+        extra = ('unix_in_sec',) if usecols is not None and 'unixtime' in usecols else ()
+        df = self._read_csv(file, usecols, extra, header='infer')
+        if 'unix_in_sec' in df:
+            df['unixtime'] = pd.to_datetime(df['unix_in_sec'], unit='s')
+            df = df.drop(['unix_in_sec'], axis=1)
         return(df)
+
+    def to_blocks(self, df, dtype='float64'):
+        '''Return the LiquidityBlocks of a dataframe loaded from this dataset,
+           with the level and lot columns as arrays of dtype, such as
+           'float32' to halve their size.'''
+        return LiquidityBlocks.from_frame(df, dtype)
         
 liqLoader = LiqLoader()
@@ -1,11 +1,12 @@
 from . import Loader
 
-import pandas as pd
 import os
 
 class OrbitalInsightLoader(Loader):
     dataset = 'ORBITALINSIGHT'
     fileglob = 'ORBITALINSIGHT_*.csv'
+    # ORBITALINSIGHT_<location>_<sublocation>_...
+    filename_pattern = r'^[^_]*_(?P<kind>[^_]*)_(?:.*?(?P<date>(?:19|20)\d{6}))?'
     
     columns = ['storage.capacity.estimate', 'volume.estimate.stderr', 'scaled.estimate.stderr',
                          'total.available.tanks', 'smoothed.estimate', 'sampled.tanks.1w',
@@ -19,11 +20,11 @@ class OrbitalInsightLoader(Loader):
                         'scaled.estimate', 'scaled.estimate.stderr'),
               'date': 'date'}
 
-    def _load(self, file):
+    def _load(self, file, usecols=None):
         _, location, sublocation, _ = os.path.basename(file).split('_', 3)
         if sublocation != '0':
             location = location + '_' + sublocation
-        df = pd.read_csv(file, low_memory=False)
+        df = self._read_csv(file, header='infer')
         df['location'] = location
         return df
 
@@ -1,10 +1,10 @@
 from . import Loader
 
-import pandas as pd
 
 class SOFROISLoader(Loader):
     dataset = 'SOFR'
     fileglob = 'SOFR_OIS_*.csv'
+    partition_date = 'Trade Date'
     columns = ['Trade Date', 'Exchange Code', 'Currency','Commodity Code', 
                 'Short Description','Long Description', 'Curve Date', 'Offset', 
                 'Discount Factor', 'Forward rate', 'Rate']
@@ -16,10 +16,10 @@ class SOFROISLoader(Loader):
               'float': ('Discount Factor','Rate'),
               'date:%Y%m%d': ('Trade Date',)}
 
-    def _load(self, file):
+    def _load(self, file, usecols=None):
         # Assumption: the header from the value column provides
         # the name of the measure for that CSV file.
-        df = pd.read_csv(file, low_memory=False)
+        df = self._read_csv(file, header='infer')
         return df
 
 sofroisLoader = SOFROISLoader()
@@ -1,9 +1,5 @@
 from . import Loader
 
-import pandas as pd
-import gzip
-import json
-
 class SOFRStripRatesLoader(Loader):
     dataset = 'SOFRSR'
     fileglob = 'SOFRSR_TermRate_Fixings_*.JSON'
@@ -17,13 +13,8 @@ class SOFRStripRatesLoader(Loader):
         'date:%m-%d-%Y:%H:%M:%S' : ('transactionTime')
              }
 
-    def _load(self, filename):
-        result = []
-        with open(filename, 'rt', encoding='utf-8') as f:
-            for line in f:
-                line = json.loads(line)
-            result = pd.json_normalize(line['payload'])
-            
-        return result
+    def _load(self, filename, usecols=None):
+        # As before, only the fixings on the last line are read
+        return self._read_json(filename, 'payload', last=True, normalize=True)
 
 SOFRstripratesLoader = SOFRStripRatesLoader()
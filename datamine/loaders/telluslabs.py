@@ -1,6 +1,5 @@
 from . import Loader
 
-import pandas as pd
 
 class TellusLabsLoader(Loader):
     dataset = 'TELLUSLABS'
@@ -15,10 +14,10 @@ class TellusLabsLoader(Loader):
               'float': ('value',),
               'date:%Y-%m-%d': ('metric_date',)}
 
-    def _load(self, file):
+    def _load(self, file, usecols=None):
         # Assumption: the header from the value column provides
         # the name of the measure for that CSV file.
-        df = pd.read_csv(file, low_memory=False)
+        df = self._read_csv(file, header='infer')
         df['measure'] = df.columns[-1]
         return df
 
@@ -1,10 +1,41 @@
 from . import Loader
 
+import numpy as np
 import pandas as pd
 
+
+def _trade_datetimes(dates, times):
+    '''Combine YYYYMMDD dates and HH:MM:SS times into datetimes without
+       joining them as strings: each distinct date and time is converted
+       once, and the rows add the offset of their time to the midnight of
+       their date. Times may also be given as HHMMSS integers.'''
+    date_codes, date_values = pd.factorize(dates)
+    numbers = pd.to_numeric(pd.Series(date_values), errors='coerce')
+    days = pd.to_datetime(pd.DataFrame({'year': numbers // 10000, 'month': numbers // 100 % 100,
+                                        'day': numbers % 100}), errors='coerce')
+    time_codes, time_values = pd.factorize(times)
+    if pd.api.types.is_numeric_dtype(time_values):
+        seconds = (time_values // 10000 * 3600 + time_values // 100 % 100 * 60 + time_values % 100)
+        offsets = pd.to_timedelta(np.asarray(seconds, dtype='float64'), unit='s')
+    else:
+        offsets = pd.to_timedelta(pd.Index(time_values).astype(str), errors='coerce')
+    # Work in the unit pd.to_datetime gives, as for the other date columns.
+    # The last entries, NaT, are selected by the code -1 of missing values
+    unit = np.datetime_data(days.dtype)[0]
+    days = np.append(days.to_numpy(), np.datetime64('NaT', unit))
+    offsets = np.append(np.asarray(offsets, dtype='timedelta64[{}]'.format(unit)), np.timedelta64('NaT', unit))
+    return pd.Series(days[date_codes] + offsets[time_codes], index=dates.index)
+
+
 class TickLoader(Loader):
     dataset = 'TICK'
     fileglob = '*.gz'
+    partition_date = 'trade_date'
+    partition_product = 'ticker_symbol'
+    # trade_date_time is inserted before the columns of the file
+    column_offset = 1
+    sort_by = ('trade_date_time', 'trade_sequence_number')
+    schema_version = 3
 
     columns = ['trade_date_time', 'trade_date', 'trade_time',
                'trade_sequence_number', 'session_indicator',
@@ -21,15 +52,17 @@ class TickLoader(Loader):
                            'insert_code_type', 'fast_late_indicator', 'cabinet_indicator', 'book_indicator'),
               'int64': ('trade_sequence_number', 'contract_delivery_date', 'trade_quantity'),
               'float': ('strike_price', 'trade_price'),
-              'date:%H:%M:%s': ('trade_time'),
+              'date:%H:%M:%S': ('trade_time'),
               'date:%Y%m%d': ('trade_date', 'entry_date'),
               'date': ('trade_date_time')}
 
-    def _load(self, file):
-        df = pd.read_csv(file, header=None, low_memory=False)
+    def _load(self, file, usecols=None):
+        derive = usecols is None or 'trade_date_time' in usecols
+        df = self._read_csv(file, usecols, (0, 1) if derive else ())
         
         # Make trade_date_time the first column
-        df.insert(0, -1, df[0].astype(str) + 'T' + df[1].astype(str))
+        if derive:
+            df.insert(0, -1, _trade_datetimes(df[0], df[1]))
         
         return(df)
 
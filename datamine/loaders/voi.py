@@ -1,10 +1,13 @@
 from . import Loader
 
-import pandas as pd
 
 class VOILoader(Loader):
     dataset = 'VOI'
     fileglob = '*.gz'
+    # The 17th character from the end is p for preliminary or f for final data
+    filename_pattern = r'^(?:(?=.*(?P<kind>[pf]).{16}$))?.*?(?P<date>(?:19|20)\d{6})'
+    partition_date = 'Trade Date'
+    partition_product = 'Product Code'
 
     columns = ['Trade Date','Exchange Code','Product Code','Product Description',
                 'Product Type','Put/Call','Strike Price',
@@ -22,13 +25,14 @@ class VOILoader(Loader):
               'date:%Y%m%d:%s': ('Trade Date',),
               }
 
-    def _load(self, file):
-        df = pd.read_csv(file, skiprows=1, header=None, low_memory=False)
+    def _load(self, file, usecols=None):
+        df = self._read_csv(file, usecols, skiprows=1)
         
         #Need to extract the timing of the data from the file name.
-        if file[-17] == 'p':
+        _, kind = self._file_label(file)
+        if kind == 'p':
             df['DataType'] = 'Preliminary'
-        if file[-17] == 'f':
+        if kind == 'f':
             df['DataType'] = 'Final'
         return df
 
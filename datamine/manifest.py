@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import time
+
+from .utils import logger
+
+MANIFEST_NAME = '.datamine_manifest.json'
+SAVE_INTERVAL = 5
+
+
+class DownloadManifest(object):
+    """
+    Persistent record of the files downloaded into a local path.
+
+    Each entry is keyed by FID and records the dataset, the filename
+    supplied by the server, the catalog size and the number of bytes
+    actually written, and whether the download completed. The manifest
+    is stored as JSON in the root of the download path, so that it
+    survives across sessions and can be inspected by hand.
+    """
+
+    def __init__(self, path, name=MANIFEST_NAME):
+        self.path = path
+        self.filename = os.path.join(path, name)
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved = 0
+        self._entries = self._read()
+
+    def _read(self):
+        if not os.path.exists(self.filename):
+            return {}
+        try:
+            with open(self.filename, 'rt', encoding='utf-8') as fp:
+                entries = json.load(fp)
+        except (OSError, ValueError) as exc:
+            logger.warning('manifest: ignoring unreadable manifest {}: {}'.format(self.filename, exc))
+            return {}
+        if not isinstance(entries, dict):
+            logger.warning('manifest: ignoring malformed manifest {}'.format(self.filename))
+            return {}
+        return entries
+
+    def __contains__(self, fid):
+        return fid in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, fid):
+        return self._entries.get(fid)
+
+    def local_path(self, fid):
+        """Return the local path of the file recorded for the FID, or None."""
+        entry = self._entries.get(fid)
+        if not entry or not entry.get('filename'):
+            return None
+        return os.path.join(self.path, entry['dataset'], entry['filename'])
+
+    def is_current(self, fid, record):
+        """Return True if the file for this catalog record is complete on disk.
+
+           A file is current if its download completed, the catalog has not
+           reported a different size since, and the file on disk still has
+           the number of bytes that were written.
+        """
+        entry = self._entries.get(fid)
+        if not entry or not entry.get('complete'):
+            return False
+        size = record.get('size')
+        if size is not None and entry.get('size') is not None and str(size) != str(entry['size']):
+            return False
+        abs_path = self.local_path(fid)
+        try:
+            if os.path.getsize(abs_path) == entry['bytes']:
+                return True
+        except (OSError, TypeError, KeyError):
+            pass
+        # The original may have been replaced by a columnar copy
+        transcoded = entry.get('transcoded')
+        return bool(transcoded) and os.path.exists(os.path.join(self.path, entry['dataset'], transcoded))
+
+    def start(self, fid, record, filename):
+        """Record that a download has begun, before any bytes are written."""
+        with self._lock:
+            self._entries[fid] = {'dataset': record['dataset'],
+                                  'filename': filename,
+                                  'size': record.get('size'),
+                                  'bytes': 0,
+                                  'complete': False}
+            self._dirty = True
+
+    def complete(self, fid, record, filename, nbytes):
+        """Record that a download has finished successfully."""
+        with self._lock:
+            self._entries[fid] = {'dataset': record['dataset'],
+                                  'filename': filename,
+                                  'size': record.get('size'),
+                                  'bytes': nbytes,
+                                  'complete': True,
+                                  'updated': time.time()}
+            self._dirty = True
+
+    def transcoded(self, fid, filename):
+        """Record the name of a columnar copy of a downloaded file."""
+        with self._lock:
+            self._entries[fid]['transcoded'] = filename
+            self._dirty = True
+
+    def save(self, force=False):
+        """Write the manifest to disk if it has changed.
+
+           Unless force is True, writes are rate-limited to one every
+           SAVE_INTERVAL seconds so that large parallel downloads do
+           not spend their time rewriting the manifest.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            if not force and now - self._saved < SAVE_INTERVAL:
+                return
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+            temp = self.filename + '.tmp'
+            with open(temp, 'wt', encoding='utf-8') as fp:
+                json.dump(self._entries, fp)
+            os.replace(temp, self.filename)
+            self._dirty = False
+            self._saved = now
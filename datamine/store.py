@@ -0,0 +1,219 @@
+import functools
+import os
+from urllib.parse import quote
+
+import pandas as pd
+
+from .catalog import _yyyymmdd
+from .loaders.base import _filter_mask, pa
+from .utils import tqdm_execute_tasks, logger, sqlite_connect
+
+STORE_NAME = '.datamine_store'
+INDEX_NAME = 'index.sqlite'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sources (
+    dataset TEXT,
+    source TEXT,
+    fingerprint TEXT,
+    PRIMARY KEY (dataset, source)
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    filename TEXT PRIMARY KEY,
+    dataset TEXT,
+    date TEXT,
+    product TEXT,
+    source TEXT,
+    rows INTEGER
+);
+CREATE INDEX IF NOT EXISTS partitions_dataset_date ON partitions (dataset, date, product);
+CREATE INDEX IF NOT EXISTS partitions_source ON partitions (dataset, source);
+'''
+
+
+def _partition_dates(series):
+    '''Return the YYYYMMDD date of each value of a date column, or an empty
+       string where there is none.'''
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.strftime('%Y%m%d').fillna('')
+    text = series.astype(str).str.strip()
+    dates = pd.to_datetime(text, format='%Y%m%d', errors='coerce')
+    missing = dates.isna() & series.notna()
+    if missing.any():
+        # Dates in other formats, such as MM/DD/YYYY
+        dates[missing] = pd.to_datetime(text[missing], errors='coerce')
+    return dates.dt.strftime('%Y%m%d').fillna('')
+
+
+class PartitionedStore(object):
+    """
+    A local store of parsed datasets, laid out as Parquet files partitioned
+    by trade date, and by product for the datasets whose loaders name a
+    product column:
+
+        <path>/<DATASET>/date=<YYYYMMDD>/product=<code>/<source file>.parquet
+
+    Each downloaded file contributes one Parquet file to every partition it
+    has rows for. An SQLite index in the root of the store records the date
+    and product of every Parquet file, so that queries open only the files
+    of the partitions they select, and the fingerprint of every source file,
+    so that only new or changed files are parsed again. The columns used are
+    the partition_date and partition_product attributes of the loader.
+    Writing and reading the store requires pyarrow.
+    """
+
+    def __init__(self, path, name=INDEX_NAME):
+        self.path = path
+        self.filename = os.path.join(path, name)
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite_connect(self.filename, None if self._initialized else _SCHEMA)
+        self._initialized = True
+        return conn
+
+    def _check(self, loader):
+        if pa is None:
+            raise RuntimeError('PartitionedStore requires the pyarrow package')
+        if loader.partition_date is None:
+            raise RuntimeError('Dataset {} cannot be partitioned by date'.format(loader.dataset))
+
+    def _fingerprint(self, loader, filename):
+        source = filename if os.path.exists(filename) else loader._columnar_path(filename)
+        stat = os.stat(source)
+        return repr((stat.st_size, stat.st_mtime_ns, loader._schema(),
+                     loader.partition_date, loader.partition_product))
+
+    def _partition(self, loader, filename):
+        '''Parse a file with the loader and write its rows to the partitions.
+
+           :returns: the name of the file, its fingerprint, and a list of
+                     (filename, date, product, rows) tuples for the Parquet
+                     files written.
+        '''
+        fingerprint = self._fingerprint(loader, filename)
+        df = loader._load_single(filename)
+        if loader.index is not None:
+            df = df.reset_index()
+        keys = [_partition_dates(df[loader.partition_date])]
+        if loader.partition_product is not None:
+            product = df[loader.partition_product]
+            keys.append(product.astype(str).where(product.notna(), ''))
+        source = os.path.basename(filename)
+        parts = []
+        for key, part in df.groupby(keys, sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            date, product = key if len(keys) > 1 else (key[0], None)
+            directory = os.path.join(loader.dataset, 'date=' + date)
+            if product is not None:
+                directory = os.path.join(directory, 'product=' + quote(product, safe=''))
+            relpath = os.path.join(directory, source + '.parquet')
+            target = os.path.join(self.path, relpath)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp = '{}.{}.tmp'.format(target, os.getpid())
+            part.to_parquet(temp, index=False)
+            os.replace(temp, target)
+            parts.append((relpath, date, product, len(part)))
+        return source, fingerprint, parts
+
+    def _record(self, dataset, source, fingerprint, parts):
+        conn = self._connect()
+        try:
+            with conn:
+                old = set(row[0] for row in conn.execute(
+                    'SELECT filename FROM partitions WHERE dataset = ? AND source = ?', (dataset, source)))
+                conn.execute('DELETE FROM partitions WHERE dataset = ? AND source = ?', (dataset, source))
+                conn.executemany('INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?, ?)',
+                                 [(relpath, dataset, date, product, source, rows)
+                                  for relpath, date, product, rows in parts])
+                conn.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?)', (dataset, source, fingerprint))
+        finally:
+            conn.close()
+        # The rows of a changed file may no longer fall in every partition they did
+        for relpath in old.difference(relpath for relpath, _, _, _ in parts):
+            try:
+                os.remove(os.path.join(self.path, relpath))
+            except FileNotFoundError:
+                pass
+
+    def ingest(self, loader, filenames, limit=None, max_workers=None):
+        '''Add new or changed files to the store, in parallel.
+
+           :param filenames: A directory, glob pattern, filename or list of
+                             filenames, as for Loader.load.
+           :returns: the number of files parsed.
+        '''
+        self._check(loader)
+        filenames = loader._filenames(filenames, limit)
+        conn = self._connect()
+        try:
+            known = dict(conn.execute('SELECT source, fingerprint FROM sources WHERE dataset = ?',
+                                      (loader.dataset,)))
+        finally:
+            conn.close()
+        todo = [fname for fname in filenames
+                if known.get(os.path.basename(fname)) != self._fingerprint(loader, fname)]
+        logger.info('store: {} of {} {} files already stored'.format(len(filenames) - len(todo), len(filenames),
+                                                                     loader.dataset))
+        if not todo:
+            return 0
+        results = tqdm_execute_tasks(functools.partial(self._partition, loader), todo,
+                                     'storing {} data'.format(loader.dataset), max_workers)
+        for source, fingerprint, parts in results:
+            self._record(loader.dataset, source, fingerprint, parts)
+        return len(todo)
+
+    def partitions(self, dataset, start=None, end=None, products=None):
+        '''Return the names of the Parquet files, relative to the store, of the
+           partitions of the dataset that match the given dates and products.'''
+        query = 'SELECT filename FROM partitions WHERE dataset = ?'
+        params = [dataset]
+        start, end = _yyyymmdd(start), _yyyymmdd(end)
+        if start is not None:
+            query += ' AND date >= ?'
+            params.append(start)
+        if end is not None:
+            query += ' AND date <= ?'
+            params.append(end)
+        if products is not None:
+            products = [products] if isinstance(products, str) else [str(product) for product in products]
+            query += ' AND product IN ({})'.format(', '.join('?' * len(products)))
+            params.extend(products)
+        if not os.path.exists(self.filename):
+            return []
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute(query + ' ORDER BY date, product, source', params)]
+        finally:
+            conn.close()
+
+    def query(self, loader, start=None, end=None, products=None, columns=None, filters=None, output='pandas'):
+        '''Read the rows of the partitions matching the given trade dates and
+           products, reading no other partitions.
+
+           :param start: Only read trade dates on or after this date (YYYYMMDD).
+           :param end: Only read trade dates on or before this date (YYYYMMDD).
+           :param products: A product code, or a list of them, to read. Only for
+                            datasets partitioned by product.
+           :param columns, filters, output: As for Loader.load.
+        '''
+        self._check(loader)
+        loader._check_output(output)
+        if products is not None and loader.partition_product is None:
+            raise RuntimeError('Dataset {} is not partitioned by product'.format(loader.dataset))
+        loader._check_columns(columns, filters)
+        wanted = loader._wanted(columns, filters)
+        frames = []
+        for relpath in self.partitions(loader.dataset, start, end, products):
+            df = loader._read_columnar(os.path.join(self.path, relpath), wanted)
+            if filters:
+                df = df.loc[_filter_mask(df, filters)]
+            if columns is not None:
+                df = loader._select(df, columns)
+            if loader.index is not None and loader.index in df:
+                df = df.set_index(loader.index)
+            frames.append(df)
+        logger.info('store: read {} {} partitions'.format(len(frames), loader.dataset))
+        if output == 'pandas':
+            return loader._finalize(loader._concat(frames))
+        return loader._concat_tables([loader._to_table(df) for df in frames], output)
@@ -1,9 +1,15 @@
 import logging
+import os
+import itertools
+import sqlite3
+from collections import deque
 
 from tqdm import tqdm
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 MAX_WORKERS = 4
+# Seconds to wait for another process to release a SQLite database
+SQLITE_TIMEOUT = 30
 
 logger = logging.getLogger(__name__.rsplit('.', 1)[0])
 
@@ -32,3 +38,71 @@ def tqdm_execute_tasks(fn, keys, desc, max_workers=MAX_WORKERS, mode='process'):
         for f in tqdm(as_completed(futures), total=len(keys), desc=desc):
             pass
         return [f.result() for f in futures]
+
+def tqdm_iterate_tasks(fn, keys, desc, max_workers=MAX_WORKERS, read_ahead=None, mode='process'):
+    """
+    Equivalent to executor.map(fn, values), but yields the results in order
+    while submitting no more than read_ahead tasks (twice the number of
+    workers by default) beyond the result last yielded, so that results
+    are not accumulated faster than they are consumed
+    """
+    keys = list(keys)
+    if max_workers is None:
+        # The defaults of ThreadPoolExecutor and ProcessPoolExecutor
+        cpus = os.cpu_count() or 1
+        max_workers = min(32, cpus + 4) if mode == 'thread' else cpus
+    with tqdm(total=len(keys), desc=desc) as progress:
+        if max_workers == 1:
+            for key in keys:
+                result = fn(key)
+                progress.update()
+                yield result
+            return
+        Executor = ThreadPoolExecutor if mode == 'thread' else ProcessPoolExecutor
+        with Executor(max_workers=max_workers) as executor:
+            read_ahead = read_ahead or 2 * max_workers
+            pending = iter(keys)
+            futures = deque(executor.submit(fn, key) for key in itertools.islice(pending, read_ahead))
+            try:
+                while futures:
+                    result = futures.popleft().result()
+                    futures.extend(executor.submit(fn, key) for key in itertools.islice(pending, 1))
+                    progress.update()
+                    yield result
+            finally:
+                # If the caller stopped early, do not wait for unneeded results
+                for future in futures:
+                    future.cancel()
+
+def run_coroutine(coro):
+    """
+    Equivalent to asyncio.run(coro), but also usable when an event loop is
+    already running in this thread, as it is in a Jupyter notebook
+    """
+    import asyncio
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+def sqlite_connect(filename, schema=None):
+    """
+    Open a connection to a SQLite database. If a schema is given, as it is
+    on the first connection of a process, the directory is created, the
+    database is switched to write-ahead logging and the schema script is run
+    """
+    if schema is not None:
+        path = os.path.dirname(filename)
+        if path and not os.path.exists(path):
+            os.makedirs(path, exist_ok=True)
+    conn = sqlite3.connect(filename, timeout=SQLITE_TIMEOUT)
+    if schema is not None:
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(schema)
+        except Exception:
+            conn.close()
+            raise
+    return conn
@@ -14,6 +14,8 @@ setup(
     maintainer_email="hamza.amjad@cmegroup.com",
     license="BSD 3-Clause",
     install_requires=['requests', 'urllib3', 'pandas', 'tqdm', 'futures'],
+    extras_require={'asyncio': ['aiohttp'], 'columnar': ['pyarrow'], 'polars': ['pyarrow', 'polars'],
+                    'json': ['orjson']},
     packages=find_packages(exclude=['tests']),
     long_description=long_description,
     long_description_content_type="text/markdown",
@@ -0,0 +1,26 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+oneqbit = importlib.import_module('datamine.loaders.1qbit')
+
+
+def _histogram(weights, low=-1.0, width=0.01):
+    df = pd.DataFrame([weights], columns=oneqbit.MIX_BINS)
+    df['MIX_LOW_BIN'] = low
+    df['MIX_BIN_SIZE'] = width
+    return oneqbit.MixHistogram.from_frame(df)
+
+
+def test_quantile_skips_empty_leading_and_trailing_bins():
+    # All of the weight in the bin from +10% to +11%
+    weights = np.zeros(len(oneqbit.MIX_BINS))
+    weights[110] = 1.0
+    result = _histogram(weights).quantile([0, 0.5, 1])
+    np.testing.assert_allclose(result.iloc[0].to_numpy(), [0.10, 0.105, 0.11])
+
+
+def test_quantile_of_row_without_weight_is_nan():
+    result = _histogram(np.zeros(len(oneqbit.MIX_BINS))).quantile(0)
+    assert np.isnan(result.iloc[0])
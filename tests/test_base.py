@@ -0,0 +1,33 @@
+import gzip
+
+import pytest
+
+from datamine.loaders import Loader
+
+
+@pytest.fixture
+def eod_file(tmp_path):
+    loader = Loader.by_name('EOD')
+    row = ['20200102', 'CME', 'F', 'ES', 'ES', 'E-mini', 'F', 'ES'] + ['1'] * (len(loader.columns) - 8)
+    path = str(tmp_path / 'EOD_20200102.csv.gz')
+    with gzip.open(path, 'wt') as f:
+        f.write((','.join(row) + '\n') * 3)
+    return path
+
+
+def test_load_selects_columns(eod_file):
+    df = Loader.by_name('EOD').load([eod_file], columns=['Settlement'])
+    assert list(df.columns) == ['Settlement']
+    assert (df['Settlement'] == 1).all()
+
+
+@pytest.mark.parametrize('kwargs', [{'columns': ['Settle']},
+                                    {'columns': ['Settlement'], 'filters': [('Settle', '>', 0)]}])
+def test_load_rejects_unknown_columns(eod_file, kwargs):
+    with pytest.raises(RuntimeError, match='Unknown columns for dataset EOD: Settle'):
+        Loader.by_name('EOD').load([eod_file], **kwargs)
+
+
+def test_load_rejects_sort_with_streaming(eod_file):
+    with pytest.raises(RuntimeError, match="sort cannot be combined with over_budget='stream'"):
+        Loader.by_name('TICK').load([eod_file], sort=True, memory_budget=1, over_budget='stream')